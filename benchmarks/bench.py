@@ -0,0 +1,321 @@
+"""Benchmarks for the gamelist parser, the compositor and the batch renderer.
+
+Usage:
+    python benchmarks/bench.py run --output results.json
+    python benchmarks/bench.py run --sizes 1000,200000 --only parse,memory --output results.json
+    python benchmarks/bench.py compare baseline.json results.json
+
+Each scenario runs in its own process so its peak RSS is measured alone.
+Synthetic inputs are generated once into --workdir and reused.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RESULTS_VERSION = 1
+DEFAULT_WORKDIR = os.path.join(tempfile.gettempdir(), "xml2png_bench")
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def parse_resolution(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+# --- Scenarios (run in a child process) ---
+
+def _setup_render(workdir, resolution):
+    import synthetic
+    size = parse_resolution(resolution)
+    background = synthetic.write_background(workdir, size)
+    artwork = synthetic.write_artwork(workdir)
+    logo = synthetic.write_logo(workdir)
+    return synthetic.templates(background, artwork, logo, size)
+
+
+def _bench_games(workdir, count):
+    import synthetic
+    from model.xml_parser import XMLParser
+    # Games with and without artwork, in list order
+    paths = synthetic.write_gamelists(workdir, max(1000, count))
+    return XMLParser.parse(paths["hyperspin"])[:count]
+
+
+def scenario_parse(spec, workdir):
+    import synthetic
+    from model.gamelist_cache import GamelistCache
+    from model.xml_parser import XMLParser
+    path = synthetic.write_gamelists(workdir, spec["size"])[spec["format"]]
+
+    cache = None
+    if spec.get("cached"):
+        # Warm parsed gamelist cache: measures reopening an unchanged gamelist
+        cache = GamelistCache(os.path.join(workdir, "gamelist_cache"))
+        XMLParser.parse(path, cache=cache)
+
+    start = time.perf_counter()
+    games = XMLParser.parse(path, cache=cache)
+    elapsed = time.perf_counter() - start
+    return {"games": len(games), "seconds": elapsed, "games_per_sec": len(games) / elapsed}
+
+
+def scenario_memory(spec, workdir):
+    import gc
+    import pickle
+    import tracemalloc
+    import synthetic
+    from model.xml_parser import XMLParser
+    path = synthetic.write_gamelists(workdir, spec["size"])[spec["format"]]
+
+    gc.collect()
+    tracemalloc.start()
+    if spec["container"] == "compact":
+        games = XMLParser.parse_compact(path)
+    else:
+        games = XMLParser.parse(path)
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # What sending the whole list to a worker process costs
+    pickled = len(pickle.dumps(games, protocol=pickle.HIGHEST_PROTOCOL))
+    return {"games": len(games), "held_mb": round(held / (1024 * 1024), 1),
+            "bytes_per_game": held / len(games), "pickle_bytes_per_game": pickled / len(games)}
+
+
+def scenario_composite(spec, workdir):
+    from model.artwork_cache import ArtworkCache
+    from model.compositor import ImageCompositor
+
+    layers = _setup_render(workdir, spec["resolution"])[spec["template"]]
+    games = _bench_games(workdir, spec["count"])
+    # No on-disk artwork cache: measure decoding and resampling, not the cache
+    compositor = ImageCompositor(artwork_cache=ArtworkCache(max_bytes=0))
+    plan = compositor.compile(layers)
+
+    start = time.perf_counter()
+    for game in games:
+        compositor.composit_plan(game, plan)
+    elapsed = time.perf_counter() - start
+    return {"images": len(games), "seconds": elapsed, "images_per_sec": len(games) / elapsed,
+            "ms_per_image": elapsed / len(games) * 1000}
+
+
+def scenario_batch(spec, workdir):
+    from model.artwork_cache import ArtworkCache
+    from model.batch_renderer import BatchRenderer
+    from model.compositor import ImageCompositor
+    from model.encoder import EncoderSettings
+
+    layers = _setup_render(workdir, spec["resolution"])[spec["template"]]
+    games = _bench_games(workdir, spec["count"])
+
+    dest = os.path.join(workdir, "out", f"{spec['template']}_{spec['resolution']}")
+    artwork_cache_dir = os.path.join(workdir, "artwork_cache")
+    for folder in (dest, artwork_cache_dir):
+        shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(dest)
+
+    # Cold artwork cache, serial rendering: per-stage times are not spread over processes
+    compositor = ImageCompositor(artwork_cache=ArtworkCache(artwork_cache_dir))
+    compositor.font_resolver.ensure_loaded()
+    renderer = BatchRenderer(layers, dest, workers=1, compositor=compositor, force=True,
+                             encoder_settings=EncoderSettings(spec["format"]), profile=True)
+    result = renderer.run(games)
+    # Profiler totals per stage (decode, resize, text_layout, ...), tracked by compare as *_time
+    stages = {f"stage_{stage}_time": summary["total"]
+              for stage, summary in result.profile.report()["stages"].items()}
+    return {
+        "images": result.rendered,
+        "failed": result.failed,
+        "seconds": result.elapsed,
+        "images_per_sec": result.images_per_second,
+        "composite_time": result.composite_time,
+        "encode_time": result.encode_time,
+        "write_time": result.write_time,
+        "output_mb": round(result.output_bytes / (1024 * 1024), 2),
+        **stages,
+    }
+
+
+SCENARIOS = {"parse": scenario_parse, "memory": scenario_memory, "composite": scenario_composite,
+             "batch": scenario_batch}
+
+
+def run_scenario_child(spec_json, workdir):
+    spec = json.loads(spec_json)
+    metrics = SCENARIOS[spec["kind"]](spec, workdir)
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(metrics))
+    return 0
+
+
+# --- Run / compare ---
+
+def scenario_specs(args):
+    specs = []
+    if "parse" in args.only:
+        for size in args.sizes:
+            for fmt in ("hyperspin", "emulationstation"):
+                specs.append((f"parse/{fmt}/{size}", {"kind": "parse", "format": fmt, "size": size}))
+                specs.append((f"parse-cached/{fmt}/{size}",
+                              {"kind": "parse", "format": fmt, "size": size, "cached": True}))
+    if "memory" in args.only:
+        for container in ("list", "compact"):
+            specs.append((f"memory/{container}/{args.memory_size}",
+                          {"kind": "memory", "format": "hyperspin", "size": args.memory_size, "container": container}))
+    for kind in ("composite", "batch"):
+        if kind not in args.only:
+            continue
+        for resolution in args.resolutions:
+            for template in args.templates:
+                spec = {"kind": kind, "template": template, "resolution": resolution, "count": args.render_count}
+                if kind == "batch":
+                    spec["format"] = args.format
+                specs.append((f"{kind}/{template}/{resolution}", spec))
+    return specs
+
+
+def cmd_run(args) -> int:
+    os.makedirs(args.workdir, exist_ok=True)
+    results = {}
+    for name, spec in scenario_specs(args):
+        print(f"{name} ...", file=sys.stderr, flush=True)
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "_scenario", json.dumps(spec),
+                               "--workdir", args.workdir], capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            print(f"error: scenario {name} failed", file=sys.stderr)
+            return 1
+        metrics = json.loads(proc.stdout.strip().splitlines()[-1])
+        results[name] = metrics
+        print("  " + ", ".join(f"{k}={_fmt(v)}" for k, v in metrics.items()), file=sys.stderr)
+
+    from PIL import __version__ as pillow_version
+    report = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pillow": pillow_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+def _fmt(value):
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+
+def metric_direction(metric):
+    """1 if higher is better, -1 if lower is better, 0 for informational values."""
+    if metric.endswith("_per_sec"):
+        return 1
+    if metric in ("seconds", "ms_per_image", "peak_rss_mb", "held_mb") or metric.endswith(("_time", "_per_game")):
+        return -1
+    return 0
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    """Rows of (scenario, metric, baseline, current, change, regressed)."""
+    rows = []
+    for name, metrics in current["results"].items():
+        base_metrics = baseline["results"].get(name)
+        if base_metrics is None:
+            continue
+        for metric, value in metrics.items():
+            direction = metric_direction(metric)
+            base = base_metrics.get(metric)
+            if not direction or not base or value is None:
+                continue
+            change = (value - base) / base
+            rows.append((name, metric, base, value, change, change * direction < -threshold))
+    return rows
+
+
+def cmd_compare(args) -> int:
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    regressions = 0
+    for name, metric, base, value, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        regressions += regressed
+        print(f"{name:40} {metric:16} {_fmt(base):>12} -> {_fmt(value):>12} {change:+7.1%} {flag}")
+
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%} in {len(rows)} compared metrics")
+    return 1 if regressions else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="bench", description="XML2PNG benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmarks and save the results as JSON")
+    run.add_argument("-o", "--output", help="Results file (default: print to stdout)")
+    run.add_argument("--workdir", default=DEFAULT_WORKDIR,
+                     help=f"Synthetic inputs and outputs, reused between runs (default: {DEFAULT_WORKDIR})")
+    run.add_argument("--sizes", default="1000,10000,100000", type=lambda s: [int(v) for v in s.split(",")],
+                     help="Gamelist sizes for the parse benchmarks (default: 1000,10000,100000)")
+    run.add_argument("--resolutions", default="1920x1080", type=lambda s: s.split(","),
+                     help="Canvas (background) sizes for the render benchmarks (default: 1920x1080)")
+    run.add_argument("--templates", default="text-only,art-heavy,mixed", type=lambda s: s.split(","),
+                     help="Templates to render (default: text-only,art-heavy,mixed)")
+    run.add_argument("--render-count", type=int, default=200, help="Games rendered per render benchmark (default: 200)")
+    run.add_argument("--format", default="png", help="Output format of the batch benchmarks (default: png)")
+    run.add_argument("--memory-size", type=int, default=200000,
+                     help="Gamelist size of the memory benchmarks (default: 200000)")
+    run.add_argument("--only", default="parse,composite,batch", type=lambda s: s.split(","),
+                     help="Benchmark kinds to run: parse, memory, composite, batch (default: parse,composite,batch)")
+
+    cmp = sub.add_parser("compare", help="Compare results against a baseline, exit 1 on regressions")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.10,
+                     help="Relative change counted as a regression (default: 0.10)")
+
+    child = sub.add_parser("_scenario")
+    child.add_argument("spec")
+    child.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        return cmd_run(args)
+    if args.command == "compare":
+        return cmd_compare(args)
+    return run_scenario_child(args.spec, args.workdir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
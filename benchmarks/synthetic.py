@@ -0,0 +1,183 @@
+"""Deterministic synthetic inputs for the benchmarks: gamelists, artwork, backgrounds, templates.
+
+Everything is generated from a fixed seed into a work directory and reused
+by later runs, so two benchmark runs on the same machine see the same data.
+"""
+import os
+import random
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw
+
+from model.compositor import Layer, LayerType, TextSource
+
+SEED = 1991
+GENRES = ["Platform", "Shooter", "Racing", "Puzzle", "Fighting", "Sports", "RPG", "Beat'em Up", "Maze", "Quiz"]
+MANUFACTURERS = ["Sega", "Nintendo", "Capcom", "Konami", "Namco", "Taito", "SNK", "Irem", "Data East", "Atari"]
+WORDS = ("dragon star force space hyper turbo legend quest ninja strike super mega power blaster "
+         "knight shadow zone galaxy fighter thunder crystal rally street master wonder").split()
+
+# Artwork sets: folder name -> (width, height) of every image in it
+ARTWORK_SETS = {
+    "wheel": (800, 400),     # PNG with transparency
+    "boxart": (2000, 2800),  # Large JPEG scans
+}
+ART_COUNT = 300 # Games (from the start of the list) that get artwork; the others exercise misses
+
+
+def rom_name(index: int) -> str:
+    return f"game{index:06d}"
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 4)))
+
+
+def _description(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60))).capitalize() + "."
+
+
+def write_gamelists(folder: str, size: int) -> Dict[str, str]:
+    """Hyperspin and EmulationStation gamelists with the same size games. Returns {format: path}."""
+    paths = {
+        "hyperspin": os.path.join(folder, f"hyperspin_{size}.xml"),
+        "emulationstation": os.path.join(folder, f"emulationstation_{size}.xml"),
+    }
+    if all(os.path.exists(path) for path in paths.values()):
+        return paths
+
+    rng = random.Random(SEED + size)
+    games = []
+    for i in range(size):
+        games.append((rom_name(i), escape(_title(rng)), escape(_description(rng)), str(rng.randint(1975, 2005)),
+                      escape(rng.choice(GENRES)), escape(rng.choice(MANUFACTURERS))))
+
+    with open(paths["hyperspin"], "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0"?>\n<menu>\n<header><listname>benchmark</listname></header>\n')
+        for rom, title, desc, year, genre, manufacturer in games:
+            f.write(f'<game name="{rom}"><description>{title}: {desc}</description><year>{year}</year>'
+                    f'<genre>{genre}</genre><manufacturer>{manufacturer}</manufacturer></game>\n')
+        f.write("</menu>\n")
+
+    with open(paths["emulationstation"], "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0"?>\n<gameList>\n')
+        for rom, title, desc, year, genre, manufacturer in games:
+            f.write(f'<game><path>./roms/{rom}.zip</path><name>{title}</name><desc>{desc}</desc>'
+                    f'<releasedate>{year}0101T000000</releasedate><genre>{genre}</genre>'
+                    f'<developer>{manufacturer}</developer><publisher>{manufacturer}</publisher></game>\n')
+        f.write("</gameList>\n")
+    return paths
+
+
+def _artwork(size: Tuple[int, int], rng: random.Random, transparent: bool) -> Image.Image:
+    # Smooth gradients plus a few shapes: compresses and resamples like real artwork, not like noise
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    tint = Image.new("RGB", size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    img = Image.blend(img, tint, 0.6)
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        r = rng.randint(size[0] // 20, size[0] // 4)
+        draw.ellipse((x - r, y - r, x + r, y + r),
+                     fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    if transparent:
+        mask = Image.new("L", size, 0)
+        ImageDraw.Draw(mask).rounded_rectangle((size[0] // 10, size[1] // 10, size[0] * 9 // 10, size[1] * 9 // 10),
+                                               radius=size[1] // 5, fill=255)
+        img = img.convert("RGBA")
+        img.putalpha(mask)
+    return img
+
+
+def write_artwork(folder: str) -> Dict[str, str]:
+    """One folder per ARTWORK_SETS entry, ART_COUNT images each. Returns {set name: folder}."""
+    folders = {}
+    for name, size in ARTWORK_SETS.items():
+        set_folder = os.path.join(folder, "artwork", name)
+        folders[name] = set_folder
+        done_marker = os.path.join(set_folder, ".complete")
+        if os.path.exists(done_marker):
+            continue
+
+        os.makedirs(set_folder, exist_ok=True)
+        rng = random.Random(f"{SEED}-{name}")
+        for i in range(ART_COUNT):
+            if name == "wheel":
+                _artwork(size, rng, True).save(os.path.join(set_folder, f"{rom_name(i)}.png"))
+            else:
+                _artwork(size, rng, False).save(os.path.join(set_folder, f"{rom_name(i)}.jpg"), quality=90)
+        open(done_marker, "w").close()
+    return folders
+
+
+def write_background(folder: str, size: Tuple[int, int]) -> str:
+    path = os.path.join(folder, f"background_{size[0]}x{size[1]}.png")
+    if not os.path.exists(path):
+        _artwork(size, random.Random(f"{SEED}-bg-{size}"), False).save(path)
+    return path
+
+
+def write_logo(folder: str) -> str:
+    path = os.path.join(folder, "logo.png")
+    if not os.path.exists(path):
+        _artwork((600, 200), random.Random(f"{SEED}-logo"), True).save(path)
+    return path
+
+
+def _layers(background: str, extra: List[Layer]) -> List[Layer]:
+    # Same shape as the GUI: background + 10 layers, unused ones disabled
+    layers = [Layer(name="Background", type=LayerType.IMAGE, enabled=True, image_path=background)]
+    layers.extend(extra)
+    while len(layers) < 11:
+        layers.append(Layer(name=f"Layer #{len(layers)}", type=LayerType.TEXT, enabled=False))
+    return layers
+
+
+def _text(name, source, x, y, w, h, size, **kwargs) -> Layer:
+    return Layer(name=name, type=LayerType.TEXT, enabled=True, text_source=source,
+                 x=x, y=y, width=w, height=h, font_size=size, **kwargs)
+
+
+def _folder(name, folder, x, y, w, h, **kwargs) -> Layer:
+    return Layer(name=name, type=LayerType.IMAGE_FOLDER, enabled=True, folder_path=folder,
+                 x=x, y=y, width=w, height=h, **kwargs)
+
+
+def templates(background: str, artwork: Dict[str, str], logo: str, size: Tuple[int, int]) -> Dict[str, List[Layer]]:
+    """The standard templates, laid out relative to the canvas size."""
+    w, h = size
+
+    def sx(v): return int(v * w / 1920)
+    def sy(v): return int(v * h / 1080)
+
+    text_only = _layers(background, [
+        _text("Name", TextSource.NAME, sx(80), sy(60), sx(1200), sy(120), sy(72), use_game_name_tag=True, is_bold=True),
+        _text("Year", TextSource.YEAR, sx(80), sy(200), sx(300), sy(60), sy(40)),
+        _text("Genre", TextSource.GENRE, sx(400), sy(200), sx(500), sy(60), sy(40), is_italic=True),
+        _text("Manufacturer", TextSource.MANUFACTURER, sx(950), sy(200), sx(600), sy(60), sy(40)),
+        _text("Description", TextSource.DESCRIPTION, sx(80), sy(300), sx(1000), sy(700), sy(32)),
+        _text("Custom", TextSource.CUSTOM, sx(1500), sy(1000), sx(400), sy(60), sy(28), text_prefix="benchmark",
+              text_align="right"),
+    ])
+
+    art_heavy = _layers(background, [
+        Layer(name="Logo", type=LayerType.IMAGE, enabled=True, image_path=logo,
+              x=sx(1500), y=sy(40), width=sx(380), height=sy(130)),
+        _folder("Box", artwork["boxart"], sx(100), sy(100), sx(600), sy(850)),
+        _folder("Box mirrored", artwork["boxart"], sx(1300), sy(300), sx(400), sy(560), mirror=True, rotation=90),
+        _folder("Wheel", artwork["wheel"], sx(750), sy(700), sx(500), sy(250)),
+        _folder("Wheel stretched", artwork["wheel"], sx(750), sy(100), sx(500), sy(150), stretch=True),
+    ])
+
+    mixed = _layers(background, [
+        _folder("Box", artwork["boxart"], sx(1250), sy(100), sx(600), sy(850)),
+        _folder("Wheel", artwork["wheel"], sx(80), sy(40), sx(600), sy(200)),
+        _text("Year", TextSource.YEAR, sx(80), sy(260), sx(300), sy(60), sy(40)),
+        _text("Genre", TextSource.GENRE, sx(400), sy(260), sx(500), sy(60), sy(40)),
+        _text("Description", TextSource.DESCRIPTION, sx(80), sy(360), sx(1000), sy(600), sy(32)),
+        Layer(name="Logo", type=LayerType.IMAGE, enabled=True, image_path=logo,
+              x=sx(80), y=sy(980), width=sx(300), height=sy(80)),
+    ])
+
+    return {"text-only": text_only, "art-heavy": art_heavy, "mixed": mixed}
@@ -0,0 +1,160 @@
+"""Headless command line interface (no PyQt import).
+
+Usage:
+    python src/main.py render gamelist.xml --template template.json --dest out/
+"""
+import argparse
+import os
+import sys
+import time
+
+COMMANDS = ("render",)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="xml2png", description="XML2PNG headless renderer")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    render = sub.add_parser("render", help="Render every game of a gamelist with a saved layer template")
+    render.add_argument("xml", help="Hyperspin or EmulationStation XML gamelist")
+    render.add_argument("-t", "--template", required=True, help="Layer template (.json) saved from the GUI")
+    render.add_argument("-d", "--dest", required=True, help="Destination folder (created if missing)")
+    render.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Render processes (default: CPU count, 1 = no multiprocessing)")
+    render.add_argument("--chunk-size", type=int, default=16, help="Games sent to a worker at once (default: 16)")
+    render.add_argument("-f", "--format", default="png", choices=["png", "webp", "webp-lossless", "jpg"],
+                        help="Output image format, webp is lossy, jpg drops transparency (default: png)")
+    render.add_argument("-p", "--preset", default="balanced", choices=["fast", "balanced", "smallest"],
+                        help="Compression preset: encode speed vs file size (default: balanced)")
+    render.add_argument("--quality", type=int, default=None,
+                        help="Quality 1-100 for the lossy formats (default: 80 for webp, 75 for jpg)")
+    render.add_argument("--optimize", action="store_true",
+                        help="Extra optimization pass for png/jpg: smaller files, slower encoding")
+    render.add_argument("--queue-depth", type=int, default=4,
+                        help="Images waiting to be encoded / written per process, bounds memory use (default: 4)")
+    render.add_argument("--extensions", default="png,jpg,jpeg,webp,bmp",
+                        help="Artwork extensions for folder layers, in order of preference (default: png,jpg,jpeg,webp,bmp)")
+    render.add_argument("--force", action="store_true",
+                        help="Render every game, even those the render manifest says are up to date")
+    render.add_argument("--no-xml-cache", action="store_true",
+                        help="Always parse the XML, without reading or updating the parsed gamelist cache")
+    selection = render.add_argument_group("selection", "Render only some games (criteria are combined)")
+    selection.add_argument("--roms", metavar="FILE",
+                           help="Rom list file: one rom name per line, # for comments")
+    selection.add_argument("--match", metavar="GLOB", action="append", default=[],
+                           help="Shell-style pattern on the rom name, e.g. 'sonic*' (repeatable, any of them)")
+    selection.add_argument("--genre", metavar="GLOB", action="append", default=[],
+                           help="Genre, case-insensitive, wildcards allowed (repeatable, any of them)")
+    selection.add_argument("--manufacturer", metavar="GLOB", action="append", default=[],
+                           help="Manufacturer, case-insensitive, wildcards allowed (repeatable, any of them)")
+    selection.add_argument("--years", metavar="RANGE", help="Year or range: 1992, 1990-1995, 1990- or -1995")
+    selection.add_argument("--dry-run", action="store_true",
+                           help="Only count the selected games and those that would be rendered")
+    render.add_argument("--profile", metavar="REPORT",
+                        help="Time every stage per game and layer, and write a report (.json or .csv)")
+    render.add_argument("-q", "--quiet", action="store_true", help="Only print the summary line")
+    return parser
+
+
+def cmd_render(args) -> int:
+    # Imported here so `--help` and argument errors stay instant
+    from model.xml_parser import GameList, XMLParser
+    from model.gamelist_cache import GamelistCache
+    from model.game_filter import GameFilter, load_rom_list, parse_years
+    from model.template import load_template
+    from model.batch_renderer import BatchRenderer
+    from model.encoder import EncoderSettings
+    from model.text_sprites import TextSpriteCache
+
+    try:
+        layers = load_template(args.template)
+    except Exception as e:
+        print(f"error: failed to load template: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        # Streamed: rendering starts while the rest of the gamelist is still being read
+        games = XMLParser.iter_games(args.xml, cache=None if args.no_xml_cache else GamelistCache())
+    except Exception as e:
+        print(f"error: failed to parse XML: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        year_min, year_max = parse_years(args.years) if args.years else (None, None)
+        game_filter = GameFilter(load_rom_list(args.roms) if args.roms else frozenset(), tuple(args.match),
+                                 tuple(args.genre), tuple(args.manufacturer), year_min, year_max)
+    except (OSError, ValueError) as e:
+        print(f"error: invalid selection: {e}", file=sys.stderr)
+        return 1
+    # Evaluated before rendering: a cached gamelist is filtered on its columns, a streamed one lazily
+    games = game_filter.apply(games) if isinstance(games, GameList) else game_filter.select(games)
+
+    encoder_settings = EncoderSettings(args.format, args.preset, args.quality, args.optimize)
+
+    renderer = BatchRenderer(layers, args.dest, workers=args.workers,
+                             chunk_size=args.chunk_size, encoder_settings=encoder_settings,
+                             force=args.force, folder_extensions=args.extensions.split(","),
+                             queue_depth=args.queue_depth, profile=bool(args.profile))
+
+    if args.dry_run:
+        try:
+            pending, up_to_date = renderer.count_pending(games)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        print(f"{os.path.basename(args.xml)}: {pending + up_to_date} games selected, "
+              f"{pending} to render, {up_to_date} up to date (dry run)")
+        return 0
+
+    os.makedirs(args.dest, exist_ok=True)
+
+    last_report = [0.0]
+
+    def on_progress(done, total):
+        now = time.perf_counter()
+        if args.quiet or now - last_report[0] < 2.0:
+            return
+        last_report[0] = now
+        if total:
+            print(f"  {done}/{total} ({int(done / total * 100)}%)", file=sys.stderr)
+        else:
+            print(f"  {done} done", file=sys.stderr)
+
+    def on_error(rom_name, message):
+        print(f"Error processing {rom_name}: {message}", file=sys.stderr)
+
+    try:
+        result = renderer.run(games, on_progress=on_progress, on_error=on_error)
+    except KeyboardInterrupt:
+        renderer.stop()
+        print("Interrupted.", file=sys.stderr)
+        return 130
+    except ValueError as e:
+        # Malformed XML found after rendering started
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{os.path.basename(args.xml)}: {result.rendered} rendered, {result.skipped} up to date, "
+          f"{result.failed} failed "
+          f"in {result.elapsed:.1f}s ({result.images_per_second:.1f} images/sec)")
+    if result.rendered:
+        # Summed over all processes, so they can exceed the wall clock time above
+        print(f"  composite {result.composite_time:.1f}s, encode {result.encode_time:.1f}s, write {result.write_time:.1f}s, "
+              f"{result.output_bytes / (1024 * 1024):.1f} MB written "
+              f"({args.format}, {args.preset})")
+        if result.text_sprites:
+            print(f"  text sprite hits: {TextSpriteCache.format_stats(result.text_sprites)}")
+    if result.profile:
+        try:
+            result.profile.write_report(args.profile)
+            print(f"  profile written to {args.profile}")
+        except OSError as e:
+            print(f"error: failed to write profile: {e}", file=sys.stderr)
+    return 1 if result.failed else 0
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "render":
+        return cmd_render(args)
+    return 2
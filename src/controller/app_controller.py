@@ -1,9 +1,21 @@
-from PyQt6.QtCore import QObject, QThread, pyqtSignal
-from typing import List
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QImage
+from typing import List, Sequence
+import dataclasses
+import threading
 
 from model.xml_parser import XMLParser, GameEntry
 from model.compositor import ImageCompositor, Layer, LayerType
+from model.artwork_cache import ArtworkCache
+from model.batch_renderer import BatchRenderer
+from model.encoder import EncoderSettings
+from model.game_filter import GameFilter
+from model.gamelist_cache import GamelistCache
+from model.layer_cache import LayerRasterCache
+from model.text_sprites import TextSpriteCache
+from model.template import load_template, save_template
 from view.main_window import MainWindow
+from view.preview_widget import pil_to_qimage
 
 import os
 import sys
@@ -12,6 +24,7 @@ from utils.updater import Updater
 from PyQt6.QtWidgets import QMessageBox
 
 VERSION = "1.0.4"
+FULL_PREVIEW_DELAY_MS = 400 # Idle time after an edit before rendering the preview at full resolution
 
 class UpdateWorker(QThread):
     finished = pyqtSignal(bool, str, str) # found, version, url
@@ -24,75 +37,161 @@ class UpdateWorker(QThread):
         found, ver, url = self.updater.check_for_updates()
         self.finished.emit(found, ver, url)
 
+class CountWorker(QThread):
+    """Dry run of a batch (fingerprints and file stats of every selected game) off the GUI thread."""
+    counted = pyqtSignal(int, int, str) # to render, up to date, error message ("" on success)
+
+    def __init__(self, renderer, games):
+        super().__init__()
+        self.renderer = renderer
+        self.games = games
+
+    def run(self):
+        try:
+            pending, up_to_date = self.renderer.count_pending(self.games)
+        except Exception as e:
+            self.counted.emit(0, 0, str(e))
+            return
+        self.counted.emit(pending, up_to_date, "")
+
 class BatchWorker(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal()
     
-    def __init__(self, games, layers, dest_folder, compositor):
+    def __init__(self, games, layers, dest_folder, compositor, workers=1, force=False, encoder_settings=None,
+                 profile_path=None):
         super().__init__()
         self.games = games
         self.layers = layers
         self.dest_folder = dest_folder
         self.compositor = compositor
         self.running = True
+        # Timing report written after the batch when set (profiling is off otherwise)
+        self.profile_path = profile_path
+        self.profile_message = ""
+        # workers > 1 renders in a process pool, 1 keeps everything in this thread
+        self.renderer = BatchRenderer(layers, dest_folder, workers=workers, compositor=compositor, force=force,
+                                      encoder_settings=encoder_settings, profile=bool(profile_path))
 
     def run(self):
-        total = len(self.games)
-        for i, game in enumerate(self.games):
-            if not self.running:
-                break
-                
+        result = self.renderer.run(self.games, on_progress=self._on_progress, on_error=self._on_error)
+        print(f"Batch: {result.rendered} rendered, {result.skipped} up to date, {result.failed} failed "
+              f"in {result.elapsed:.1f}s ({result.images_per_second:.1f} img/s)")
+        if result.rendered:
+            print(f"Batch: composite {result.composite_time:.1f}s, encode {result.encode_time:.1f}s, write {result.write_time:.1f}s, "
+                  f"{result.output_bytes / (1024 * 1024):.1f} MB written")
+        if result.text_sprites:
+            print(f"Batch: text sprite hits: {TextSpriteCache.format_stats(result.text_sprites)}")
+        if result.profile and self.profile_path:
             try:
-                # Determine background path from layers[0] (Background)
-                # In our model, Layer 0 is treated as a layer too, but we pass it as BG path?
-                # Actually compositor takes list of layers AND specific bg_path.
-                # Let's assume Layer 0 IS the background layer if type=IMAGE.
-                
-                # Logic: The Compositor iterates all layers.
-                # If Layer 0 is just an image, we can pass it as background or just let it render first.
-                # Our compositor implementation clears to black, then renders layers.
-                # So we just pass all layers.
-                
-                # BUT, compositor.composit signature is: (game, layers, background_path)
-                # And we logic'd that background_path is separate.
-                # Let's adjust: Layer 0 = Background. If type=Image, use its path as bg_path.
-                
-                bg_layer = self.layers[0]
-                bg_path = bg_layer.image_path if bg_layer.type == LayerType.IMAGE else ""
-                
-                # Render (excluding 'background' layer from the list passed as 'layers' if we use bg_path arg? 
-                # Or just pass all and let it overdraw?
-                # Best: Pass all layers including #0. The compositor draws them in order.
-                # If Layer #0 is "Background", it draws first.
-                # The 'background_path' arg in compositor was for the base canvas.
-                # We can just ignore that arg if Layer #0 covers it, or pass Layer 0 path.
-                
-                img = self.compositor.composit(game, self.layers, bg_path)
-                
-                # Save
-                save_name = f"{game.rom_name}.png"
-                save_path = os.path.join(self.dest_folder, save_name)
-                img.save(save_path)
-                
-            except Exception as e:
-                print(f"Error processing {game.rom_name}: {e}")
-            
-            self.progress.emit(int(((i + 1) / total) * 100))
-        
+                result.profile.write_report(self.profile_path)
+                self.profile_message = f"Timing report written to {self.profile_path}"
+            except OSError as e:
+                self.profile_message = f"Failed to write the timing report: {e}"
+            print(f"Batch: {self.profile_message}")
         self.finished.emit()
 
+    def _on_progress(self, done, total):
+        if total:
+            self.progress.emit(int((done / total) * 100))
+
+    def _on_error(self, rom_name, message):
+        print(f"Error processing {rom_name}: {message}")
+
     def stop(self):
         self.running = False
+        self.renderer.stop()
+
+
+class PreviewWorker(QThread):
+    """Renders previews off the GUI thread, always for the latest request.
+
+    Requests that arrive while a render is running replace each other, so
+    only the newest layer state is rendered next; stale results are dropped.
+    """
+    rendered = pyqtSignal(int, QImage, float) # request id, image, scale vs full resolution
+
+    def __init__(self, compositor):
+        super().__init__()
+        self.compositor = compositor
+        # Keeps per-layer rasters so an edit only re-renders the edited layer
+        self.layer_cache = LayerRasterCache(compositor)
+        self._cond = threading.Condition()
+        self._request = None
+        self._latest_id = 0
+        self._quit = False
+
+    @property
+    def latest_id(self):
+        return self._latest_id
+
+    def request(self, game, layers, display_size=None) -> int:
+        """Queue a render. With display_size (w, h) a proxy fitting that size is
+        rendered instead of the full resolution image."""
+        # Layers are edited in place by the GUI, render a snapshot of their current state
+        snapshot = [dataclasses.replace(layer) for layer in layers]
+        with self._cond:
+            self._latest_id += 1
+            self._request = (self._latest_id, game, snapshot, display_size)
+            self._cond.notify()
+            return self._latest_id
+
+    def stop(self):
+        with self._cond:
+            self._quit = True
+            self._cond.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._request is None and not self._quit:
+                    self._cond.wait()
+                if self._quit:
+                    return
+                request_id, game, layers, display_size = self._request
+                self._request = None
+
+            try:
+                scale = 1.0
+                if display_size:
+                    full_w, full_h = self.compositor.canvas_size(layers)
+                    scale = min(display_size[0] / full_w, display_size[1] / full_h, 1.0)
+
+                img = self.layer_cache.composit(game, layers, scale=scale)
+                qimage = pil_to_qimage(img)
+            except Exception as e:
+                print(f"Preview error: {e}")
+                continue
+
+            # A newer request is already waiting: don't bother the GUI with this one
+            if request_id == self._latest_id:
+                self.rendered.emit(request_id, qimage, scale)
 
 
 class AppController(QObject):
     def __init__(self):
         super().__init__()
         self.view = MainWindow()
-        self.compositor = ImageCompositor()
+        # Preview renders happen in this thread, with its own compositor. No artwork
+        # disk cache here: proxies and box edits would only fill it with throwaway sizes.
+        self.compositor = ImageCompositor(artwork_cache=ArtworkCache(max_bytes=0))
+        self.preview_worker = PreviewWorker(self.compositor)
+        self.preview_worker.rendered.connect(self._on_preview_rendered)
+        self.preview_worker.start()
+
+        # While editing, previews are proxies rendered at the widget size;
+        # the full resolution render happens once edits pause.
+        self._full_preview_timer = QTimer()
+        self._full_preview_timer.setSingleShot(True)
+        self._full_preview_timer.setInterval(FULL_PREVIEW_DELAY_MS)
+        self._full_preview_timer.timeout.connect(self._render_full_preview)
+        self._shown_preview = None # (request id, scale) of the image on screen
         
-        self.games: List[GameEntry] = []
+        self.games: Sequence[GameEntry] = []
         self.current_game_index = 0
+        # Reopening an unchanged gamelist skips parsing
+        self.gamelist_cache = GamelistCache()
         
         # Initialize Layers (Background + 10 Layers)
         self.layers: List[Layer] = []
@@ -156,6 +255,9 @@ class AppController(QObject):
         self.view.layer_selected.connect(self._on_layer_selected)
         self.view.layer_visibility_toggled.connect(self._on_layer_visibility_toggled)
         self.view.generate_clicked.connect(self.toggle_generation)
+        self.view.template_save_requested.connect(self.save_template)
+        self.view.template_load_requested.connect(self.load_template)
+        self.view.count_selection_requested.connect(self.count_selection)
         
         self.view.layer_controls.layer_changed.connect(self._on_layer_modified)
         
@@ -164,13 +266,34 @@ class AppController(QObject):
 
     def load_xml(self, path):
         try:
-            self.games = XMLParser.parse(path)
+            # Column-oriented: a fraction of the memory of a list of entries
+            self.games = XMLParser.parse_compact(path, cache=self.gamelist_cache)
             self.current_game_index = 0
             self.view.show_info(f"Loaded {len(self.games)} games successfully.")
             self._update_preview()
         except Exception as e:
             self.view.show_error(f"Failed to parse XML: {e}")
 
+    def save_template(self, path):
+        try:
+            save_template(self.layers, path)
+        except Exception as e:
+            self.view.show_error(f"Failed to save template: {e}")
+
+    def load_template(self, path):
+        try:
+            layers = load_template(path)
+        except Exception as e:
+            self.view.show_error(f"Failed to load template: {e}")
+            return
+
+        # Replace in place, the list object is shared with the view
+        self.layers[:] = layers
+        self.view.set_layers(self.layers)
+        self.view.select_layer(0)
+        self._on_layer_selected(0)
+        self._update_preview()
+
     def set_destination(self, path):
         self.dest_folder = path
 
@@ -178,6 +301,7 @@ class AppController(QObject):
         if 0 <= index < len(self.layers):
             layer = self.layers[index]
             self.view.layer_controls.set_layer(layer)
+            self.view.preview.set_highlight_layer(layer)
 
     def _on_layer_modified(self):
         # Layer object is modified in place by the widget controls
@@ -199,29 +323,49 @@ class AppController(QObject):
             self._update_preview()
 
     def _update_preview(self):
-        game = None
+        self._request_preview(proxy=True)
+        self._full_preview_timer.start()
+
+    def _render_full_preview(self):
+        # Nothing to do if the latest proxy already was full resolution (widget larger than the output)
+        if self._shown_preview == (self.preview_worker.latest_id, 1.0):
+            return
+        self._request_preview(proxy=False)
+
+    def _request_preview(self, proxy):
         if self.games:
             game = self.games[self.current_game_index]
         else:
             # Dummy game for preview if no XML loaded
             game = GameEntry("Sonic The Hedgehog 2", "Sonic The Hedgehog 2", "Dr. Robotnik is back and he's planning to take over the world again! It's up to Sonic and his new pal Tails to stop him.", "1992", "Platformer", "SEGA")
 
-        # Background path logic
-        bg_layer = self.layers[0]
-        bg_path = bg_layer.image_path if (bg_layer.type == LayerType.IMAGE and bg_layer.enabled) else ""
-        
+        display_size = None
+        if proxy:
+            label = self.view.preview.image_label
+            ratio = label.devicePixelRatioF()
+            display_size = (max(1, int(label.width() * ratio)), max(1, int(label.height() * ratio)))
+
+        # Rendered in the background, the result comes back through _on_preview_rendered
+        self.preview_worker.request(game, self.layers, display_size)
+
+    def _on_preview_rendered(self, request_id, qimage, scale):
+        if request_id != self.preview_worker.latest_id:
+            return # Superseded by a newer edit
+        self._shown_preview = (request_id, scale)
+
         # Determine the currently selected layer to highlight
         idx = self.view.layer_list._selected_index if hasattr(self.view, 'layer_list') else 0
         highlight_layer = None
         if 0 <= idx < len(self.layers):
             highlight_layer = self.layers[idx]
 
-        # Render
-        try:
-            img = self.compositor.composit(game, self.layers, bg_path)
-            self.view.preview.update_image(img, highlight_layer=highlight_layer)
-        except Exception as e:
-            print(f"Preview error: {e}")
+        self.view.preview.update_qimage(qimage, highlight_layer=highlight_layer, scale=scale)
+
+    def shutdown(self):
+        self._full_preview_timer.stop()
+        self.preview_worker.stop()
+        if hasattr(self, 'count_worker'):
+            self.count_worker.wait()
 
     def toggle_generation(self):
         if hasattr(self, 'worker') and self.worker.isRunning():
@@ -233,6 +377,50 @@ class AppController(QObject):
             # Start
             self.start_batch_generation()
 
+    def _selected_games(self):
+        """Games matching the "Only:" field (all when empty), None if the field is invalid."""
+        try:
+            return GameFilter.parse(self.view.edit_selection.text()).apply(self.games)
+        except (OSError, ValueError) as e:
+            self.view.show_error(f"Invalid selection: {e}")
+            return None
+
+    def _encoder_settings(self):
+        return EncoderSettings(self.view.combo_output_format.currentData(),
+                               self.view.combo_compression.currentData())
+
+    def count_selection(self):
+        if not self.games:
+            self.view.show_error("No XML loaded.")
+            return
+        games = self._selected_games()
+        if games is None:
+            return
+        message = f"{len(games)} of {len(self.games)} games selected."
+        if not getattr(self, 'dest_folder', None):
+            self.view.show_info(message)
+            return
+
+        # Dry run against the render manifest of the destination, nothing is written.
+        # The layers are copied: they may be edited while the worker runs.
+        layers = [dataclasses.replace(layer) for layer in self.layers]
+        renderer = BatchRenderer(layers, self.dest_folder, force=self.view.chk_force_rebuild.isChecked(),
+                                 encoder_settings=self._encoder_settings())
+        self._count_message = message
+        self.count_worker = CountWorker(renderer, games)
+        self.count_worker.counted.connect(self._on_counted)
+        self.view.btn_count_selection.setEnabled(False)
+        self.view.btn_count_selection.setText("Counting...")
+        self.count_worker.start()
+
+    def _on_counted(self, pending, up_to_date, error):
+        self.view.btn_count_selection.setEnabled(True)
+        self.view.btn_count_selection.setText("Count")
+        if error:
+            self.view.show_error(f"Failed to check the destination: {error}")
+        else:
+            self.view.show_info(f"{self._count_message}\n{pending} to render, {up_to_date} up to date.")
+
     def start_batch_generation(self):
         if not self.games:
             self.view.show_error("No XML loaded.")
@@ -240,7 +428,13 @@ class AppController(QObject):
         if not hasattr(self, 'dest_folder') or not self.dest_folder:
              self.view.show_error("No destination selected.")
              return
-             
+        games = self._selected_games()
+        if games is None:
+            return
+        if not games:
+            self.view.show_error("No game matches the selection.")
+            return
+
         # Button becomes Stop
         self.view.btn_generate.setText("STOP GENERATION")
         self.view.btn_generate.setStyleSheet("font-weight: bold; font-size: 14px; background-color: #f44336; color: white;")
@@ -248,7 +442,12 @@ class AppController(QObject):
         self.view.progress_bar.setVisible(True)
         self.view.progress_bar.setValue(0)
         
-        self.worker = BatchWorker(self.games, self.layers, self.dest_folder, self.compositor)
+        # No compositor passed: the preview one lives in the preview thread
+        self.worker = BatchWorker(games, self.layers, self.dest_folder, None,
+                                  workers=self.view.spin_workers.value(),
+                                  force=self.view.chk_force_rebuild.isChecked(),
+                                  encoder_settings=self._encoder_settings(),
+                                  profile_path=self.view.profile_report_path or None)
         self.worker.progress.connect(self.view.progress_bar.setValue)
         self.worker.finished.connect(self._on_batch_finished)
         self.worker.start()
@@ -260,6 +459,9 @@ class AppController(QObject):
         self.view.progress_bar.setVisible(False)
         
         if not hasattr(self, 'worker') or not self.worker.running:
-             self.view.show_info("Batch generation stopped.")
+             message = "Batch generation stopped."
         else:
-             self.view.show_info("Batch generation completed!")
+             message = "Batch generation completed!"
+        if hasattr(self, 'worker') and self.worker.profile_message:
+            message += f"\n{self.worker.profile_message}"
+        self.view.show_info(message)
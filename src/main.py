@@ -1,20 +1,30 @@
 import sys
 import os
+import multiprocessing
 
 # Add src to python path to facilitate imports if run from root
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from PyQt6.QtWidgets import QApplication
-from controller.app_controller import AppController
-
 def main():
+    # Batch rendering uses worker processes, which the frozen exe must be able to start
+    multiprocessing.freeze_support()
+
+    # Headless commands (e.g. `main.py render ...`) never import PyQt
+    import cli
+    if len(sys.argv) > 1 and sys.argv[1] in cli.COMMANDS:
+        sys.exit(cli.main(sys.argv[1:]))
+
+    from PyQt6.QtWidgets import QApplication
+    from controller.app_controller import AppController
+
     app = QApplication(sys.argv)
-    
+
     # Initialize Controller (which manages the View)
     controller = AppController()
-    
+    app.aboutToQuit.connect(controller.shutdown)
+
     print("XML2PNG (Python Edition) started.")
-    
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+import hashlib
+import io
+import os
+from typing import Optional
+
+from PIL import Image
+
+from utils.files import write_atomic
+from utils.paths import get_cache_dir
+
+CACHE_VERSION = 1
+# Decode/resample method of ImageCompositor (reduced decode, then LANCZOS), part of every key
+RESAMPLING = "lanczos-gap2"
+
+
+class ArtworkCache:
+    """On-disk cache of folder artwork already fitted to a layer box.
+
+    Box scans are often several thousand pixels wide while the layer box is a
+    few hundred: decoding and resampling them dominates a render. Fitted
+    images are stored as PNG files (lossless, so output is unchanged) keyed by
+    source path, mtime/size, box size, transformations and resampling filter.
+    Files are touched when used and the least recently used ones are deleted
+    once the cache grows past max_bytes. max_bytes = 0 disables the cache.
+    It also disables itself when its directory cannot be created or written:
+    a cache failure never costs more than the decode it would have saved.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024):
+        self._cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._total_bytes = None # Measured on the first write
+        self.hits = 0
+        self.misses = 0
+        self._failed = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and not self._failed
+
+    @property
+    def cache_dir(self) -> str:
+        if self._cache_dir is None:
+            self._cache_dir = get_cache_dir("artwork")
+        return self._cache_dir
+
+    def _path(self, source: str, stamp, transform: tuple) -> str:
+        key = repr((CACHE_VERSION, os.path.abspath(source), stamp, transform, RESAMPLING))
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        # Two-level layout keeps directories small
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.png")
+
+    def get(self, source: str, stamp, transform: tuple) -> Optional[Image.Image]:
+        """The cached fitted image, or None. transform describes the fit
+        (mirror, rotation, stretch, box width, box height)."""
+        if not self.enabled:
+            return None
+        try:
+            path = self._path(source, stamp, transform)
+            img = Image.open(path)
+            img.load()
+        except Exception:
+            self.misses += 1
+            return None
+
+        try:
+            # Mark as recently used for the LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return img if img.mode == "RGBA" else img.convert("RGBA")
+
+    def put(self, source: str, stamp, transform: tuple, img: Image.Image):
+        if not self.enabled:
+            return
+        try:
+            buffer = io.BytesIO()
+            img.save(buffer, "PNG", compress_level=1)
+        except Exception:
+            # A missed write only costs a decode and resize on the next render
+            return
+        try:
+            path = self._path(source, stamp, transform)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, buffer.getvalue())
+        except (OSError, ValueError):
+            # Unwritable cache location: run without the cache
+            self._failed = True
+            return
+        size = buffer.tell()
+
+        if self._total_bytes is None:
+            self._total_bytes = self._scan_size()
+        else:
+            self._total_bytes += size
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                if not name.endswith(".png"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Other processes may write to the same cache: start from what is really on disk
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        # Go a bit below the cap so eviction does not run on every write
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
@@ -0,0 +1,357 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from model.compositor import ImageCompositor, Layer
+from model.encoder import EncoderSettings, ImageEncoder
+from model.output_pipeline import OutputPipeline, WriteResult
+from model.profiler import NO_STAGE, RenderProfiler
+from model.render_plan import RenderPlan
+from model.text_sprites import TextSpriteCache
+from model.folder_index import DEFAULT_IMAGE_EXTENSIONS
+from model.manifest import RenderManifest, fingerprint, template_digest
+from model.xml_parser import GameEntry
+
+
+@dataclass
+class BatchResult:
+    rendered: int = 0
+    failed: int = 0
+    skipped: int = 0 # Up to date according to the render manifest
+    elapsed: float = 0.0
+    stopped: bool = False
+    # Summed over rendered games (across processes in pool mode)
+    composite_time: float = 0.0
+    encode_time: float = 0.0
+    write_time: float = 0.0
+    output_bytes: int = 0
+    profile: Optional[RenderProfiler] = None # Per-stage timings, when profiling was enabled
+    text_sprites: Dict[str, List[int]] = field(default_factory=dict) # Layer name -> [hits, misses]
+
+    @property
+    def done(self) -> int:
+        return self.rendered + self.failed + self.skipped
+
+    @property
+    def images_per_second(self) -> float:
+        return self.rendered / self.elapsed if self.elapsed > 0 else 0.0
+
+
+# --- Worker process state (one compositor and font cache per process) ---
+
+_worker_state = {}
+
+
+def _init_worker(plan: RenderPlan, dest_folder: str, encoder_settings: EncoderSettings,
+                 queue_depth: int, folder_extensions, stop_event, profile: bool):
+    _worker_state["compositor"] = ImageCompositor(folder_extensions=folder_extensions)
+    if profile:
+        _worker_state["compositor"].profiler = RenderProfiler()
+    # Compiled once by the parent: fonts and static assets are already resolved
+    _worker_state["plan"] = plan
+    # Each process encodes and writes in its own threads while it composites the next game
+    _worker_state["pipeline"] = OutputPipeline(ImageEncoder(encoder_settings), dest_folder, queue_depth)
+    _worker_state["stop_event"] = stop_event
+
+
+def _render_chunk(games: List[GameEntry]):
+    """Render a chunk in a worker process.
+
+    Returns ([rom_name, ...], [(rom_name, error), ...], [composite s, encode s, write s, bytes],
+    profiler timings or None, text sprite stats).
+    """
+    compositor = _worker_state["compositor"]
+    plan = _worker_state["plan"]
+    pipeline = _worker_state["pipeline"]
+    stop_event = _worker_state["stop_event"]
+    profiler = compositor.profiler
+
+    rendered = []
+    failures = []
+    stats = [0.0, 0.0, 0.0, 0]
+    for game in games:
+        if stop_event.is_set():
+            break
+        try:
+            with profiler.game(game.rom_name) if profiler else NO_STAGE:
+                start = time.perf_counter()
+                img = compositor.composit_plan(game, plan)
+                stats[0] += time.perf_counter() - start
+        except Exception as e:
+            failures.append((game.rom_name, str(e)))
+            if profiler:
+                profiler.end_game(game.rom_name)
+            continue
+        pipeline.put(game.rom_name, img, game.rom_name)
+
+    # Only report games once their file is written
+    for written in pipeline.flush():
+        if written.error:
+            failures.append((written.token, written.error))
+        else:
+            rendered.append(written.token)
+        stats[1] += written.encode_time
+        stats[2] += written.write_time
+        stats[3] += written.output_bytes
+        if profiler:
+            _profile_written(profiler, written.token, written)
+    return rendered, failures, stats, profiler.take() if profiler else None, compositor.text_sprites.take_stats()
+
+
+def _profile_written(profiler: RenderProfiler, rom_name: str, written: WriteResult):
+    profiler.add("encode", written.encode_time, game=rom_name)
+    profiler.add("write", written.write_time, game=rom_name)
+    profiler.end_game(rom_name)
+
+
+class BatchRenderer:
+    """Renders a list (or any iterable) of games to image files.
+
+    With workers > 1 the games are sent in chunks to a pool of processes,
+    each holding its own ImageCompositor. With workers <= 1 everything is
+    rendered in the calling thread with the given compositor.
+
+    Encoding and writing overlap with compositing (see OutputPipeline);
+    queue_depth bounds how many images wait at each of those stages.
+
+    With profile set, per-stage timings (parse, decode, resize, text layout,
+    compositing, encode, write...) are collected per game and per layer
+    and returned in BatchResult.profile.
+
+    Unless force is set, games whose fingerprint (layer settings, game
+    fields used, source asset mtime/size) matches the render manifest of
+    dest_folder and whose output exists are skipped.
+    """
+
+    SAVE_MANIFEST_EVERY = 500 # Rendered games between two manifest saves
+
+    def __init__(self, layers: List[Layer], dest_folder: str,
+                 workers: Optional[int] = None, chunk_size: int = 16,
+                 compositor: Optional[ImageCompositor] = None,
+                 encoder_settings: Optional[EncoderSettings] = None,
+                 force: bool = False, folder_extensions=DEFAULT_IMAGE_EXTENSIONS,
+                 queue_depth: int = 4, profile: bool = False):
+        self.layers = layers
+        self.dest_folder = dest_folder
+        # Output format, compression preset and quality (see model.encoder)
+        self.encoder_settings = encoder_settings or EncoderSettings()
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.compositor = compositor
+        self.force = force
+        self.queue_depth = max(1, queue_depth)
+        self.profile = profile
+        self._profiler = None
+        # Artwork extension priority, taken from the compositor's folder index when one is given
+        self.folder_extensions = compositor.folder_index.extensions if compositor else tuple(folder_extensions)
+        self._stopped = False
+        self._stop_event = None
+        self._template_digest = None
+
+    def stop(self):
+        self._stopped = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def run(self, games: Iterable[GameEntry], total: Optional[int] = None,
+            on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+            on_error: Optional[Callable[[str, str], None]] = None) -> BatchResult:
+        """Render all games. on_progress(done, total) and on_error(rom_name, message)
+        are called from the thread calling run()."""
+        if total is None and hasattr(games, "__len__"):
+            total = len(games)
+
+        start = time.perf_counter()
+        result = BatchResult()
+        self._profiler = result.profile = RenderProfiler() if self.profile else None
+        # The local compositor is also used to fingerprint games in pool mode
+        compositor = self.compositor or ImageCompositor(folder_extensions=self.folder_extensions)
+        previous_profiler = compositor.profiler
+        manifest = self._open_manifest(compositor)
+        todo = self._games_to_render(games, compositor, manifest, result)
+        # Layer settings are worked out once for the whole batch (and shipped to workers)
+        plan = compositor.compile(self.layers)
+        try:
+            if self.workers <= 1:
+                compositor.profiler = self._profiler
+                compositor.text_sprites.take_stats() # Drop lookups made before (e.g. previews)
+                try:
+                    self._run_serial(todo, compositor, plan, manifest, result, total, on_progress, on_error)
+                finally:
+                    result.text_sprites = compositor.text_sprites.take_stats()
+            else:
+                self._run_pool(todo, plan, manifest, result, total, on_progress, on_error)
+        finally:
+            compositor.profiler = previous_profiler
+            manifest.save()
+
+        if on_progress and result.skipped:
+            on_progress(result.done, total)
+        result.elapsed = time.perf_counter() - start
+        result.stopped = self._stopped
+        return result
+
+    def count_pending(self, games: Iterable[GameEntry]) -> Tuple[int, int]:
+        """Dry run: (games run() would render, games up to date). Nothing is rendered or written."""
+        compositor = self.compositor or ImageCompositor(folder_extensions=self.folder_extensions)
+        manifest = self._open_manifest(compositor)
+        result = BatchResult()
+        self._profiler = None
+        pending = sum(1 for _ in self._games_to_render(games, compositor, manifest, result))
+        return pending, result.skipped
+
+    def _open_manifest(self, compositor: ImageCompositor) -> RenderManifest:
+        manifest = RenderManifest(self.dest_folder).load()
+        # Encoder settings are part of every fingerprint: changing them re-renders everything
+        manifest.settings = self.encoder_settings.to_dict()
+        self._template_digest = template_digest(compositor.template_signature(self.layers), manifest.settings)
+        return manifest
+
+    def _games_to_render(self, games, compositor, manifest, result):
+        """Yield (game, fingerprint) for every game that needs rendering."""
+        extension = self.encoder_settings.extension
+        try:
+            existing = set(os.listdir(self.dest_folder))
+        except OSError:
+            existing = set()
+
+        profiler = self._profiler
+        games = iter(games)
+        while True:
+            # Streamed gamelists are parsed as they are consumed: time the pull
+            parse_start = time.perf_counter()
+            game = next(games, None)
+            if game is None:
+                break
+            fingerprint_start = time.perf_counter()
+            fp = fingerprint(self._template_digest, compositor.game_inputs(game, self.layers))
+            if profiler:
+                profiler.add("parse", fingerprint_start - parse_start)
+                profiler.add("fingerprint", time.perf_counter() - fingerprint_start)
+            if (not self.force and manifest.get(game.rom_name) == fp
+                    and f"{game.rom_name}{extension}" in existing):
+                result.skipped += 1
+                continue
+            yield game, fp
+
+    @staticmethod
+    def _add_stats(result, stats):
+        composite_time, encode_time, write_time, output_bytes = stats
+        result.composite_time += composite_time
+        result.encode_time += encode_time
+        result.write_time += write_time
+        result.output_bytes += output_bytes
+
+    def _record(self, manifest, rom_name, fp, result):
+        manifest.record(rom_name, fp)
+        if result.rendered % self.SAVE_MANIFEST_EVERY == 0:
+            manifest.save()
+
+    def _run_serial(self, todo, compositor, plan, manifest, result, total, on_progress, on_error):
+        pipeline = OutputPipeline(ImageEncoder(self.encoder_settings), self.dest_folder, self.queue_depth)
+        try:
+            for game, fp in todo:
+                if self._stopped:
+                    break
+                try:
+                    with self._profiler.game(game.rom_name) if self._profiler else NO_STAGE:
+                        start = time.perf_counter()
+                        img = compositor.composit_plan(game, plan)
+                        result.composite_time += time.perf_counter() - start
+                except Exception as e:
+                    if self._profiler:
+                        self._profiler.end_game(game.rom_name)
+                    result.failed += 1
+                    if on_error:
+                        on_error(game.rom_name, str(e))
+                    if on_progress:
+                        on_progress(result.done, total)
+                    continue
+
+                # Blocks when encoding/writing falls queue_depth images behind
+                pipeline.put(game.rom_name, img, (game.rom_name, fp))
+                self._collect(pipeline.completed(), manifest, result, total, on_progress, on_error)
+        finally:
+            # Images already composited are still written when stopping
+            self._collect(pipeline.close(), manifest, result, total, on_progress, on_error)
+
+    def _collect(self, written: List[WriteResult], manifest, result, total, on_progress, on_error):
+        for item in written:
+            rom_name, fp = item.token
+            result.encode_time += item.encode_time
+            result.write_time += item.write_time
+            result.output_bytes += item.output_bytes
+            if self._profiler:
+                _profile_written(self._profiler, rom_name, item)
+            if item.error:
+                result.failed += 1
+                if on_error:
+                    on_error(rom_name, item.error)
+            else:
+                result.rendered += 1
+                self._record(manifest, rom_name, fp, result)
+            if on_progress:
+                on_progress(result.done, total)
+
+    def _run_pool(self, todo, plan, manifest, result, total, on_progress, on_error):
+        # Spawn on every platform: forking a process that runs Qt threads is unsafe
+        ctx = multiprocessing.get_context("spawn")
+        self._stop_event = ctx.Event()
+        if self._stopped:
+            self._stop_event.set()
+
+        # Bound the number of queued chunks so generators are consumed lazily
+        max_pending = self.workers * 2
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                 initializer=_init_worker,
+                                 initargs=(plan, self.dest_folder, self.encoder_settings, self.queue_depth,
+                                           self.folder_extensions, self._stop_event, self.profile)) as pool:
+            pending = {}
+            exhausted = False
+            while True:
+                while not exhausted and not self._stopped and len(pending) < max_pending:
+                    chunk = list(islice(todo, self.chunk_size))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    pending[pool.submit(_render_chunk, [game for game, _ in chunk])] = chunk
+
+                if not pending:
+                    break
+
+                completed, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    chunk = pending.pop(future)
+                    if future.cancelled():
+                        continue
+                    try:
+                        rendered, failures, stats, timings, sprite_stats = future.result()
+                        self._add_stats(result, stats)
+                        TextSpriteCache.merge_stats(result.text_sprites, sprite_stats)
+                        if timings:
+                            self._profiler.merge(timings)
+                    except Exception as e:
+                        # The whole chunk was lost (e.g. worker crashed)
+                        rendered, failures = [], [(game.rom_name, str(e)) for game, _ in chunk]
+
+                    fingerprints = {game.rom_name: fp for game, fp in chunk}
+                    for rom_name in rendered:
+                        result.rendered += 1
+                        self._record(manifest, rom_name, fingerprints[rom_name], result)
+                    result.failed += len(failures)
+                    if on_error:
+                        for rom_name, message in failures:
+                            on_error(rom_name, message)
+                    if on_progress:
+                        on_progress(result.done, total)
+
+                if self._stopped:
+                    for future in pending:
+                        future.cancel()
+
+        self._stop_event = None
@@ -1,13 +1,23 @@
-from dataclasses import dataclass, field
-from typing import List, Optional, Tuple, Dict
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields, replace
+from operator import attrgetter
+from typing import Callable, Iterable, List, Optional, Tuple, Dict
 from PIL import Image, ImageDraw, ImageFont
-import os
-import textwrap
-import textwrap
+import math
 from enum import Enum
-import winreg # For Windows Registry Font Lookup
 
 from model.xml_parser import GameEntry
+from model.image_cache import ImageCache, file_stamp
+from model.artwork_cache import ArtworkCache
+from model.folder_index import FolderIndex, DEFAULT_IMAGE_EXTENSIONS
+from model.font_resolver import FontResolver
+from model.text_layout import TextLayoutEngine
+from model.text_sprites import TextSpriteCache
+from model.profiler import NO_STAGE, RenderProfiler
+from model.render_plan import PlanStep, RenderPlan
+
+# _draw_text() font_file default: look the font up by layer settings
+_BY_NAME = object()
 
 class LayerType(Enum):
     TEXT = "text"
@@ -20,7 +30,7 @@ class TextSource(Enum):
     GENRE = "genre"
     MANUFACTURER = "manufacturer"
     NAME = "name"
-    CUSTOM = "custom" # Maybe allow custom static text?
+    CUSTOM = "custom" # Static text: prefix + suffix only, same for every game
 
 @dataclass
 class Layer:
@@ -61,183 +71,377 @@ class Layer:
     rotation: int = 0  # 0, 90, 180, 270
 
 class ImageCompositor:
-    def __init__(self):
+    MAX_PLATES = 4 # Pre-rendered game-independent layer runs kept around
+    # Sources are decoded / reduced by integer factors down to this multiple of
+    # the fitted size, then resampled with LANCZOS (same idea as Image.thumbnail)
+    REDUCING_GAP = 2.0
+    FALLBACK_FAMILIES = ("Arial", "Liberation Sans", "DejaVu Sans")
+    # Text fields with few distinct values over a gamelist: their lines are drawn from cached sprites
+    SPRITE_SOURCES = (TextSource.YEAR, TextSource.GENRE, TextSource.MANUFACTURER, TextSource.CUSTOM)
+
+    def __init__(self, cache_bytes: int = 256 * 1024 * 1024,
+                 folder_extensions: Iterable[str] = DEFAULT_IMAGE_EXTENSIONS,
+                 font_resolver: Optional[FontResolver] = None,
+                 artwork_cache: Optional[ArtworkCache] = None):
         self._font_cache = {}
+        # Family + style -> font file, backed by a persistent index of the system fonts
+        self.font_resolver = font_resolver or FontResolver()
+        # Line breaking by measured advances, memoized per string/font/box
+        self.text_layout = TextLayoutEngine()
+        # Rasterized lines of low-cardinality text fields
+        self.text_sprites = TextSpriteCache()
+        # Decoded (and transformed) images, shared across games of a batch
+        self.image_cache = ImageCache(cache_bytes)
+        # rom name -> artwork file, one directory listing per IMAGE_FOLDER folder
+        self.folder_index = FolderIndex(folder_extensions)
+        # Folder artwork already fitted to its box, persisted across runs
+        self.artwork_cache = artwork_cache or ArtworkCache()
+        self._plate_cache = OrderedDict()
+        # Set to a RenderProfiler to time each stage of each layer (off by default)
+        self.profiler: Optional[RenderProfiler] = None
 
-    def _find_font_filename_in_registry(self, font_name, bold=False, italic=False):
-        # normalize name
-        search_name = font_name.lower().strip()
-        
-        # Suffixes in registry keys
-        # "Arial (TrueType)"
-        # "Arial Bold (TrueType)"
-        # "Arial Bold Italic (TrueType)"
-        
-        needed_styles = []
-        if bold: needed_styles.append("bold")
-        if italic: needed_styles.append("italic")
-        
-        key_path = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts"
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as key:
-                count = winreg.QueryInfoKey(key)[1]
-                for i in range(count):
-                    try:
-                        name, filename, _ = winreg.EnumValue(key, i)
-                        name_lower = name.lower()
-                        
-                        # Check availability of styles
-                        # Logic: if we want Bold, name must contain "bold" (usually).
-                        # But strict matching is hard.
-                        # Simple Heuristic: 
-                        # 1. Name must start with font family or contain it distinctly
-                        # 2. Check for attributes
-                        
-                        # Remove "(TrueType)" etc
-                        clean_reg_name = name_lower.replace("(truetype)", "").replace("(opentype)", "").strip()
-                        
-                        # Match family
-                        if not clean_reg_name.startswith(search_name):
-                             continue
-                        
-                        # Now check if it's the specific variant we want
-                        # If we want regular (no bold/italic), name shouldn't have them
-                        # But some fonts are just "Impact", no "Regular"
-                        
-                        has_bold = "bold" in clean_reg_name
-                        has_italic = "italic" in clean_reg_name
-                        
-                        if bold == has_bold and italic == has_italic:
-                             return filename
-                    except:
-                        continue
-        except Exception:
-            pass
-        return None
+    def _stage(self, stage: str, layer: Optional[Layer] = None):
+        if self.profiler is None:
+            return NO_STAGE
+        return self.profiler.stage(stage, layer.name if layer else None)
+
+    def _load_image(self, path: str) -> Optional[Image.Image]:
+        """Decode an image file to RGBA, going through the image cache."""
+        stamp = file_stamp(path)
+        if stamp is None:
+            return None
+
+        def load():
+            try:
+                return Image.open(path).convert("RGBA")
+            except Exception:
+                return None
+
+        return self.image_cache.get_or_load(("decoded", path, stamp), load)
+
+    def _load_resized_background(self, path: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+        bg_img = self._load_image(path)
+        if bg_img is None or bg_img.size == size:
+            return bg_img
+
+        key = ("background", path, file_stamp(path), size)
+        return self.image_cache.get_or_load(key, lambda: bg_img.resize(size, Image.Resampling.LANCZOS))
+
+    def resolve_font_file(self, font_name: str, bold=False, italic=False) -> Optional[Tuple[str, int]]:
+        """(path, face index) of a font family and style, or None if not installed."""
+        # The UI stores the family name with a dummy extension ("Arial.ttf")
+        family = font_name
+        if family.lower().endswith((".ttf", ".otf")): family = family[:-4]
+        return self.font_resolver.resolve(family, bold, italic)
 
     def get_font(self, font_name: str, size: int, bold=False, italic=False) -> ImageFont.FreeTypeFont:
         key = (font_name, size, bold, italic)
         if key not in self._font_cache:
-            
-            # 1. Try Registry Lookup (Best for "Century Gothic", etc)
-            reg_filename = self._find_font_filename_in_registry(font_name, bold, italic)
-            
-            potential_paths = []
-            system_fonts_dir = "C:\\Windows\\Fonts"
-            
-            if reg_filename:
-                # Registry gives filename only usually, sometimes full path
-                if os.path.isabs(reg_filename):
-                    potential_paths.append(reg_filename)
-                else:
-                    potential_paths.append(os.path.join(system_fonts_dir, reg_filename))
-            
-            # 2. Fallback to common mappings and heuristics (Legacy/Backup)
-            # ... (Existing logic shortened or kept as fallback)
-            # Let's keep a simplified fallback dict for standard stuff
-            font_map = {
-                "times new roman": "times", "arial": "arial", "verdana": "verdana",
-                "tahoma": "tahoma", "impact": "impact", "comic sans ms": "comic",
-                "courier new": "cour", "segoe ui": "segoeui"
-            }
-            clean_name = font_name
-            if font_name.lower().endswith(".ttf"): clean_name = font_name[:-4]
-            base = font_map.get(clean_name.lower(), clean_name)
-            
-            suffix = ""
-            if bold and italic: suffix = "bi"
-            elif bold: suffix = "bd"
-            elif italic: suffix = "i"
-            
-            potential_paths.append(os.path.join(system_fonts_dir, f"{base}{suffix}.ttf"))
-            potential_paths.append(os.path.join(system_fonts_dir, f"{base}.ttf"))
-            
-            found_font = None
-            for p in potential_paths:
-                if os.path.exists(p):
-                    try:
-                        found_font = ImageFont.truetype(p, size)
-                        break
-                    except: continue
-            
-            if not found_font:
-                # Try loading by name directly (works if library installed)
-                try: 
-                    found_font = ImageFont.truetype(font_name, size)
-                except: 
-                    try: found_font = ImageFont.truetype("arial.ttf", size) # Final Fallback
-                    except: found_font = ImageFont.load_default()
-            
-            self._font_cache[key] = found_font
-            
+            font_file = self.resolve_font_file(font_name, bold, italic)
+            self._font_cache[key] = self._load_font(font_file, font_name, size)
         return self._font_cache[key]
 
+    def font_from_file(self, font_file: Optional[Tuple[str, int]], font_name: str, size: int) -> ImageFont.FreeTypeFont:
+        """Font of a compiled plan, font_file having been resolved by compile()."""
+        key = ("file", font_file, font_name, size)
+        if key not in self._font_cache:
+            self._font_cache[key] = self._load_font(font_file, font_name, size)
+        return self._font_cache[key]
+
+    def _load_font(self, font_file: Optional[Tuple[str, int]], font_name: str, size: int) -> ImageFont.FreeTypeFont:
+        if font_file:
+            path, index = font_file
+            try:
+                return ImageFont.truetype(path, size, index=index)
+            except Exception:
+                pass
+
+        # Try loading by name directly (works if library installed)
+        try:
+            return ImageFont.truetype(font_name, size)
+        except:
+            return self._fallback_font(size)
+
+    def _fallback_font(self, size: int) -> ImageFont.FreeTypeFont:
+        try:
+            return ImageFont.truetype("arial.ttf", size) # Final Fallback
+        except Exception:
+            pass
+        # Common sans-serif families on Linux render nodes
+        for family in self.FALLBACK_FAMILIES:
+            match = self.font_resolver.resolve(family)
+            if match:
+                try:
+                    return ImageFont.truetype(match[0], size, index=match[1])
+                except Exception:
+                    continue
+        return ImageFont.load_default()
+
+    def canvas_size(self, layers: List[Layer], output_size: Optional[Tuple[int, int]] = None) -> Tuple[int, int]:
+        """Full resolution output size: output_size, else the background size."""
+        if output_size:
+            return output_size
+
+        # Always load background to get dimensions, even if hidden
+        bg_layer = layers[0]
+        if bg_layer.image_path:
+            bg_img = self._load_image(bg_layer.image_path)
+            if bg_img:
+                return bg_img.size
+        return (1024, 768) # Default fallback
+
+    @staticmethod
+    def scale_layer(layer: Layer, scale: float) -> Layer:
+        """Copy of a layer with its geometry and font size scaled (proxy rendering).
+        A box stays a box (at least 1 px), 0 stays "unconstrained"."""
+        return replace(
+            layer,
+            x=round(layer.x * scale),
+            y=round(layer.y * scale),
+            width=max(1, round(layer.width * scale)) if layer.width > 0 else layer.width,
+            height=max(1, round(layer.height * scale)) if layer.height > 0 else layer.height,
+            font_size=max(1, round(layer.font_size * scale)),
+        )
+
     def composit(self, 
                  game: GameEntry, 
                  layers: List[Layer], 
                  background_path: str,
-                 output_size: Optional[Tuple[int, int]] = None) -> Image.Image:
-        
+                 output_size: Optional[Tuple[int, int]] = None,
+                 scale: float = 1.0) -> Image.Image:
+        return self.composit_plan(game, self.compile(layers, output_size, scale))
+
+    def compile(self, layers: List[Layer], output_size: Optional[Tuple[int, int]] = None,
+                scale: float = 1.0) -> RenderPlan:
+        """Resolve everything in a layer list that does not depend on the game.
+
+        The plan renders any number of games with composit_plan(), in this
+        process or in a worker. Static image stamps and font files are looked
+        up now: compile again after changing the layers or their files.
+        """
         # 1. Canvas Setup logic
         # - If Background Layer (Layer 0) has an image, use its size as canvas default.
         # - Initialize canvas with Transparent (0,0,0,0).
+        # - scale < 1 renders a proxy: canvas, geometry and fonts are all scaled down,
+        #   rather than rendering at full resolution and shrinking the result.
         
         bg_layer = layers[0]
-        bg_img = None
-        
-        # Always load background to get dimensions, even if hidden
-        if bg_layer.image_path and os.path.exists(bg_layer.image_path):
-            try:
-                bg_img = Image.open(bg_layer.image_path).convert("RGBA")
-            except Exception:
-                pass
-        
-        # Determine Target Size from background (even if hidden)
-        target_w, target_h = (1024, 768) # Default fallback
-        if bg_img:
-            target_w, target_h = bg_img.size
-            
-        if output_size:
-            target_w, target_h = output_size
+        bg_img = self._load_image(bg_layer.image_path) if bg_layer.image_path else None
+        target_w, target_h = self.canvas_size(layers, output_size)
+
+        # The plan keeps its own copies: later edits of the layers do not leak into it
+        if scale != 1.0:
+            target_w = max(1, round(target_w * scale))
+            target_h = max(1, round(target_h * scale))
+            layers = [replace(bg_layer)] + [self.scale_layer(layer, scale) for layer in layers[1:]]
+        else:
+            layers = [replace(layer) for layer in layers]
+        bg_layer = layers[0]
+        size = (target_w, target_h)
+
+        # Everything up to the first game-dependent layer is identical for all games:
+        # render it once into a cached base plate and start each game from a copy.
+        active_layers = [layer for layer in layers[1:] if layer.enabled and layer.visible]
+        base_layers, steps = self.plan_layers(active_layers)
 
-        # Create Transparent Canvas
-        canvas = Image.new("RGBA", (target_w, target_h), (0, 0, 0, 0))
+        draw_background = bg_img is not None and bg_layer.enabled and bg_layer.visible
+        base_key = ("base", size, scale, self._layer_signature(bg_layer), draw_background,
+                    tuple(self._layer_signature(layer) for layer in base_layers))
+        compiled = (self._compile_step(kind, payload, size, scale) for kind, payload in steps)
+        return RenderPlan(size, bg_layer, draw_background, tuple(base_layers), base_key,
+                          tuple(step for step in compiled if step is not None), scale)
+
+    def _compile_step(self, kind: str, payload, size: Tuple[int, int], scale: float) -> Optional[PlanStep]:
+        # None for steps that cannot draw anything, whatever the game
+        if kind == "overlay":
+            key = ("overlay", size, scale, tuple(self._layer_signature(layer) for layer in payload))
+            return PlanStep("overlay", run=tuple(payload), plate_key=key)
+
+        layer = payload
+        if layer.type == LayerType.TEXT:
+            return PlanStep("text", layer, text_field=self.text_field(layer),
+                            font_file=self.resolve_font_file(layer.font_path, layer.is_bold, layer.is_italic))
+        if layer.type == LayerType.IMAGE:
+            stamp = file_stamp(layer.image_path) if layer.image_path else None
+            return PlanStep("image", layer, image_stamp=stamp) if stamp else None
+        if layer.type == LayerType.IMAGE_FOLDER and layer.folder_path:
+            return PlanStep("folder", layer)
+        return None
+
+    def composit_plan(self, game: Optional[GameEntry], plan: RenderPlan) -> Image.Image:
+        """Render a game with a plan from compile(): no per-layer settings work left."""
+        with self._stage("base_plate"):
+            canvas = self._get_base_plate(plan).copy()
         draw = ImageDraw.Draw(canvas)
+
+        for step in plan.steps:
+            if step.kind == "text":
+                if step.text_field is None:
+                    text = ""
+                elif game is None:
+                    text = self.get_game_text(step.layer, None)
+                else:
+                    text = step.text_field(game)
+                self._draw_text(draw, step.layer, text, step.font_file)
+            elif step.kind == "folder":
+                self._render_folder_image_layer(canvas, step.layer, game, plan.scale)
+            elif step.kind == "image":
+                self._render_static_image_layer(canvas, step.layer, step.image_stamp, plan.scale)
+            else:
+                with self._stage("overlay_plate"):
+                    overlay = self._get_overlay_plate(plan.size, step.run, step.plate_key, plan.scale)
+                    if overlay is not None:
+                        overlay_img, offset = overlay
+                        canvas.alpha_composite(overlay_img, offset)
+
+        return canvas
+
+    def _render_layer(self, canvas: Image.Image, draw: ImageDraw.Draw, layer: Layer, game: GameEntry,
+                      scale: float = 1.0):
+        # scale: proxy scale already applied to the layer geometry, used to shrink unconstrained images
+        if layer.type == LayerType.TEXT:
+            self._render_text_layer(canvas, draw, layer, game)
         
-        # Draw Background Image only if layer is enabled AND visible
-        if bg_img and bg_layer.enabled and bg_layer.visible:
-            # If output_size forced a different size, resize background?
-            # Or center it?
-            # User wants "preview adapts to background", so usually 1:1.
-            # If explicit output_size is given, we likely want to stretch bg to it.
-            if (target_w, target_h) != bg_img.size:
-                 bg_img = bg_img.resize((target_w, target_h), Image.Resampling.LANCZOS)
-            
-            canvas.paste(bg_img, (0, 0))
+        elif layer.type == LayerType.IMAGE:
+            self._render_static_image_layer(canvas, layer, scale=scale)
 
-        for i, layer in enumerate(layers):
-            # Skip if not enabled (no input configured) or not visible (eye off)
-            if not layer.enabled or not layer.visible:
+        elif layer.type == LayerType.IMAGE_FOLDER:
+            success = self._render_folder_image_layer(canvas, layer, game, scale)
+            if not success and layer.fallback_text_layer:
+                pass 
+
+    @staticmethod
+    def is_game_independent(layer: Layer) -> bool:
+        """True if the layer renders the same pixels whatever the game."""
+        if layer.type == LayerType.IMAGE:
+            return True
+        if layer.type == LayerType.TEXT:
+            return layer.text_source == TextSource.CUSTOM
+        return False
+
+    def plan_layers(self, active_layers: List[Layer]) -> Tuple[List[Layer], List[Tuple[str, object]]]:
+        """Split the active (non background) layers into a base plate and per-game steps.
+
+        Returns (base_layers, steps). base_layers is the leading run of
+        game-independent layers, drawn once on top of the background. Each step
+        is either ("layer", Layer), rendered per game, or ("overlay", [Layer, ...]),
+        a run of static images flattened into a single cached raster.
+        """
+        idx = 0
+        while idx < len(active_layers) and self.is_game_independent(active_layers[idx]):
+            idx += 1
+        base_layers = active_layers[:idx]
+
+        steps = []
+        run = []
+        for layer in active_layers[idx:]:
+            # Only images are flattened: text drawn on a transparent overlay would
+            # pick up dark fringes once composited, so it is drawn in place instead.
+            if layer.type == LayerType.IMAGE:
+                run.append(layer)
                 continue
-            
-            # Skip Layer 0 (Background) as it is handled above
-            if i == 0: continue 
+            steps.extend(self._run_steps(run))
+            run = []
+            steps.append(("layer", layer))
+        steps.extend(self._run_steps(run))
+
+        return base_layers, steps
+
+    @staticmethod
+    def _run_steps(run: List[Layer]) -> List[Tuple[str, object]]:
+        if len(run) > 1:
+            return [("overlay", list(run))]
+        # A single image is already cached fitted, flattening would only enlarge it
+        return [("layer", layer) for layer in run]
 
+    def _layer_signature(self, layer: Layer) -> tuple:
+        values = tuple(getattr(layer, f.name) for f in fields(layer))
+        if layer.type == LayerType.IMAGE and layer.image_path:
+            return values + (file_stamp(layer.image_path),)
+        return values
+
+    def template_signature(self, layers: List[Layer]) -> tuple:
+        """Settings (and static asset and font file stamps) of everything that is rendered."""
+        active_layers = [layer for layer in layers[1:] if layer.enabled and layer.visible]
+        signature = []
+        for layer in [layers[0]] + active_layers:
+            values = self._layer_signature(layer)
             if layer.type == LayerType.TEXT:
-                self._render_text_layer(canvas, draw, layer, game)
-            
-            elif layer.type == LayerType.IMAGE:
-                self._render_static_image_layer(canvas, layer)
+                # A replaced or newly installed font file changes the output under the same family name
+                font_file = self.resolve_font_file(layer.font_path, layer.is_bold, layer.is_italic)
+                values += (font_file, file_stamp(font_file[0]) if font_file else None)
+            signature.append(values)
+        return tuple(signature)
 
+    def game_inputs(self, game: GameEntry, layers: List[Layer]) -> tuple:
+        """The per-game values a render depends on: text used and folder images consulted."""
+        inputs = []
+        for layer in layers[1:]:
+            if not layer.enabled or not layer.visible:
+                continue
+            if layer.type == LayerType.TEXT:
+                inputs.append(self.get_game_text(layer, game))
             elif layer.type == LayerType.IMAGE_FOLDER:
-                success = self._render_folder_image_layer(canvas, layer, game)
-                if not success and layer.fallback_text_layer:
-                    pass 
-        
-        return canvas
+                path = self.find_folder_image(layer, game)
+                inputs.append((path, file_stamp(path) if path else None))
+        return tuple(inputs)
 
-    def _render_text_layer(self, canvas: Image.Image, draw: ImageDraw.Draw, layer: Layer, game: GameEntry):
-        # 1. Get Text Content
+    def _cached_plate(self, key, build):
+        plate = self._plate_cache.get(key)
+        if plate is None:
+            plate = build()
+            self._plate_cache[key] = plate
+            while len(self._plate_cache) > self.MAX_PLATES:
+                self._plate_cache.popitem(last=False)
+        else:
+            self._plate_cache.move_to_end(key)
+        return plate
+
+    def _get_base_plate(self, plan: RenderPlan) -> Image.Image:
+        size = plan.size
+        bg_layer = plan.background
+
+        def build():
+            # Create Transparent Canvas
+            plate = Image.new("RGBA", size, (0, 0, 0, 0))
+            draw = ImageDraw.Draw(plate)
+            
+            # Draw Background Image only if layer is enabled AND visible
+            bg_img = self._load_image(bg_layer.image_path) if plan.draw_background else None
+            if bg_img:
+                # If output_size forced a different size, resize background?
+                # Or center it?
+                # User wants "preview adapts to background", so usually 1:1.
+                # If explicit output_size is given, we likely want to stretch bg to it.
+                img = bg_img
+                if size != img.size:
+                     img = self._load_resized_background(bg_layer.image_path, size)
+                
+                plate.paste(img, (0, 0))
+
+            for layer in plan.base_layers:
+                self._render_layer(plate, draw, layer, None, plan.scale)
+            return plate
+
+        return self._cached_plate(plan.base_key, build)
+
+    def _get_overlay_plate(self, size: Tuple[int, int], run: List[Layer], key: tuple, scale: float = 1.0):
+
+        def build():
+            overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+            for layer in run:
+                self._render_static_image_layer(overlay, layer, scale=scale)
+            bbox = overlay.getbbox()
+            if bbox is None:
+                return None
+            # Keep only the painted area so the per-game composite stays small
+            return overlay.crop(bbox), bbox[:2]
+
+        return self._cached_plate(key, build)
+
+    @staticmethod
+    def get_game_text(layer: Layer, game: Optional[GameEntry]) -> str:
+        """Source text of a TEXT layer for a game, before prefix/suffix."""
         text = ""
         
         if game is None:
@@ -264,8 +468,25 @@ class ImageCompositor:
                 text = game.genre
             elif layer.text_source == TextSource.MANUFACTURER:
                 text = game.manufacturer
-        
-        if not text:
+        return text
+
+    @staticmethod
+    def text_field(layer: Layer) -> Optional[Callable[[GameEntry], str]]:
+        """Accessor of the GameEntry field a TEXT layer shows, None for static text."""
+        if layer.text_source == TextSource.CUSTOM:
+            return None
+        if layer.text_source == TextSource.NAME:
+            # Default: rom_name. Option: display_name (<name>)
+            return attrgetter("display_name" if layer.use_game_name_tag else "rom_name")
+        return attrgetter(layer.text_source.value)
+
+    def _render_text_layer(self, canvas: Image.Image, draw: ImageDraw.Draw, layer: Layer, game: GameEntry):
+        # 1. Get Text Content
+        self._draw_text(draw, layer, self.get_game_text(layer, game))
+
+    def _draw_text(self, draw: ImageDraw.Draw, layer: Layer, text: str, font_file=_BY_NAME):
+        # Custom layers have no per-game content, their text is the prefix/suffix alone
+        if not text and layer.text_source != TextSource.CUSTOM:
             return
 
         # Apply Prefix/Suffix
@@ -274,89 +495,165 @@ class ImageCompositor:
         if layer.text_suffix:
             text = f"{text}{layer.text_suffix}"
 
+        if not text:
+            return
+
         if layer.max_chars > 0 and len(text) > layer.max_chars:
             text = text[:layer.max_chars] + "..."
 
-        # 2. Get Font
-        font = self.get_font(layer.font_path, layer.font_size, bold=layer.is_bold, italic=layer.is_italic)
-
-        # 3. Wrapping
-        lines = []
-        if layer.word_wrap and layer.width > 0:
-            avg_char_width = font.getlength("x")
-            if avg_char_width > 0:
-                wrap_width = max(1, int(layer.width / avg_char_width))
-                lines = textwrap.wrap(text, width=wrap_width)
-            else: 
-                lines = [text]
-        else:
-            lines = [text]
+        with self._stage("text_layout", layer):
+            # 2. Get Font
+            font_key = (layer.font_path, layer.font_size, layer.is_bold, layer.is_italic)
+            if font_file is _BY_NAME:
+                font = self.get_font(layer.font_path, layer.font_size, bold=layer.is_bold, italic=layer.is_italic)
+            else:
+                font = self.font_from_file(font_file, layer.font_path, layer.font_size)
+
+            # 3. Wrapping and alignment (memoized)
+            text_layout = self.text_layout.layout(text, font, font_key, layer.width, layer.text_align, layer.word_wrap)
+            line_height = text_layout.line_height
 
         # 4. Draw
-        current_y = layer.y
-        # Use font metric for line height
-        bbox = font.getbbox("Tg")
-        line_height = int(bbox[3] - bbox[1] + 4)
-
-        for line in lines:
-            if current_y + line_height > layer.y + layer.height:
-                break # Clip at bottom
-            
-            # X alignment
-            line_width = font.getlength(line)
-            draw_x = layer.x
-            
-            if layer.text_align == "center":
-                draw_x = layer.x + (layer.width - line_width) / 2
-            elif layer.text_align == "right":
-                draw_x = layer.x + layer.width - line_width
-            
-            draw.text((draw_x, current_y), line, font=font, fill=layer.font_color)
-            
-            # Underline
-            if layer.is_underline:
-                underline_y = current_y + line_height - 2
-                draw.line([(draw_x, underline_y), (draw_x + line_width, underline_y)], fill=layer.font_color, width=1)
+        use_sprites = self.text_sprites.enabled and layer.text_source in self.SPRITE_SOURCES
+        with self._stage("text_draw", layer):
+            current_y = layer.y
+
+            for line, offset, line_width in zip(text_layout.lines, text_layout.x_offsets, text_layout.widths):
+                if current_y + line_height > layer.y + layer.height:
+                    break # Clip at bottom
+
+                draw_x = layer.x + offset
+                if use_sprites and draw_x >= 0:
+                    self._draw_sprite(draw, layer, line, font, font_key, draw_x, current_y)
+                else:
+                    draw.text((draw_x, current_y), line, font=font, fill=layer.font_color)
 
-            current_y += line_height
+                # Underline
+                if layer.is_underline:
+                    underline_y = current_y + line_height - 2
+                    draw.line([(draw_x, underline_y), (draw_x + line_width, underline_y)], fill=layer.font_color, width=1)
 
-    def _render_static_image_layer(self, canvas: Image.Image, layer: Layer):
-        if not layer.image_path or not os.path.exists(layer.image_path):
+                current_y += line_height
+
+    def _draw_sprite(self, draw: ImageDraw.Draw, layer: Layer, line: str, font: ImageFont.FreeTypeFont,
+                     font_key: tuple, x: float, y: int):
+        # Same pixels as draw.text() at (x, y): glyphs are placed with the sub-pixel part of x
+        start, whole = math.modf(x)
+        mask, (offset_x, offset_y) = self.text_sprites.get(line, font, font_key, start, layer.name)
+        if mask is not None:
+            draw.bitmap((int(whole) + offset_x, y + offset_y), mask, fill=layer.font_color)
+
+    def _render_static_image_layer(self, canvas: Image.Image, layer: Layer, stamp: Optional[tuple] = None,
+                                   scale: float = 1.0):
+        if not layer.image_path:
             return
-        
-        try:
-            img = Image.open(layer.image_path).convert("RGBA")
-            self._paste_image(canvas, img, layer)
-        except Exception:
-            pass
 
-    def _render_folder_image_layer(self, canvas: Image.Image, layer: Layer, game: GameEntry) -> bool:
-        if not layer.folder_path or not os.path.exists(layer.folder_path):
-            return False
-            
-        # Try finding image: rom_name.png, rom_name.jpg, game.name??
-        # Usually rom_name.png
-        
-        if not game:
+        if stamp is None:
+            stamp = file_stamp(layer.image_path)
+        if stamp is None:
+            return
+
+        def load():
+            try:
+                with self._stage("decode", layer):
+                    img = self._open_for_box(layer.image_path, layer)
+                with self._stage("resize", layer):
+                    return self._fit_image(img, layer, scale)
+            except Exception:
+                return None
+
+        # Static sources never change during a batch: keep the transformed result
+        key = ("fitted", layer.image_path, stamp, layer.mirror, layer.rotation, layer.stretch,
+               layer.width, layer.height, scale)
+        fitted = self.image_cache.get_or_load(key, load)
+        if fitted is not None:
+            self._paste_fitted(canvas, fitted, layer)
+
+    def find_folder_image(self, layer: Layer, game: Optional[GameEntry]) -> Optional[str]:
+        """Path of the image an IMAGE_FOLDER layer uses for a game, or None."""
+        if not layer.folder_path or not game:
+            return None
+        return self.folder_index.lookup(layer.folder_path, game.rom_name)
+
+    def _render_folder_image_layer(self, canvas: Image.Image, layer: Layer, game: GameEntry,
+                                   scale: float = 1.0) -> bool:
+        with self._stage("artwork_lookup", layer):
+            full_path = self.find_folder_image(layer, game)
+        if full_path is None:
             return False
-            
-        filename = f"{game.rom_name}.png"
-        full_path = os.path.join(layer.folder_path, filename)
-        
-        if not os.path.exists(full_path):
-            # Try jpg?
-             full_path = os.path.join(layer.folder_path, f"{game.rom_name}.jpg")
-             if not os.path.exists(full_path):
-                 return False
 
         try:
-            img = Image.open(full_path).convert("RGBA")
-            self._paste_image(canvas, img, layer)
+            self._paste_fitted(canvas, self._fitted_folder_image(full_path, layer, scale), layer)
             return True
         except Exception:
             return False
 
-    def _paste_image(self, canvas: Image.Image, overlay: Image.Image, layer: Layer):
+    def _fitted_folder_image(self, path: str, layer: Layer, scale: float = 1.0) -> Image.Image:
+        # Only a box makes the fitted image smaller than the source, worth keeping on disk
+        use_cache = self.artwork_cache.enabled and layer.width > 0 and layer.height > 0
+        if use_cache:
+            stamp = file_stamp(path)
+            transform = (layer.mirror, layer.rotation, layer.stretch, layer.width, layer.height)
+            with self._stage("artwork_cache", layer):
+                fitted = self.artwork_cache.get(path, stamp, transform)
+            if fitted is not None:
+                return fitted
+
+        with self._stage("decode", layer):
+            img = self._open_for_box(path, layer)
+        with self._stage("resize", layer):
+            fitted = self._fit_image(img, layer, scale)
+        if use_cache:
+            with self._stage("artwork_cache", layer):
+                self.artwork_cache.put(path, stamp, transform, fitted)
+        return fitted
+
+    def _open_for_box(self, path: str, layer: Layer) -> Image.Image:
+        """Decode an image to RGBA, at reduced resolution when the layer box is much smaller.
+
+        JPEG sources are decoded with DCT scaling (1/2, 1/4 or 1/8) to no less
+        than REDUCING_GAP times the fitted size; other formats are reduced
+        by _fit_image's resize.
+        """
+        img = Image.open(path)
+        if img.format == "JPEG":
+            draft_size = self._draft_size(img.size, layer)
+            if draft_size:
+                img.draft("RGB", draft_size)
+        return img.convert("RGBA")
+
+    def _draft_size(self, size: Tuple[int, int], layer: Layer) -> Optional[Tuple[int, int]]:
+        """Smallest source size (in source orientation) worth decoding for the layer box."""
+        if layer.width <= 0 or layer.height <= 0:
+            return None
+
+        src_w, src_h = size
+        rotated = layer.rotation in (90, 270)
+        if rotated:
+            src_w, src_h = src_h, src_w
+
+        if layer.stretch:
+            need_w, need_h = layer.width, layer.height
+        else:
+            scale = min(layer.width / src_w, layer.height / src_h)
+            need_w, need_h = src_w * scale, src_h * scale
+
+        if rotated:
+            need_w, need_h = need_h, need_w
+        return (int(need_w * self.REDUCING_GAP) + 1, int(need_h * self.REDUCING_GAP) + 1)
+
+    def _paste_fitted(self, canvas: Image.Image, overlay_resized: Image.Image, layer: Layer):
+        paste_x = layer.x
+        paste_y = layer.y
+        if layer.width > 0 and layer.height > 0:
+            # Center in box (no-op for stretched images, which fill it exactly)
+            paste_x += (layer.width - overlay_resized.width) // 2
+            paste_y += (layer.height - overlay_resized.height) // 2
+
+        with self._stage("composite", layer):
+            canvas.alpha_composite(overlay_resized, (paste_x, paste_y))
+
+    def _fit_image(self, overlay: Image.Image, layer: Layer, scale: float = 1.0) -> Image.Image:
         # Apply transformations: Mirror -> Rotation
         if layer.mirror:
             overlay = overlay.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
@@ -369,15 +666,14 @@ class ImageCompositor:
         box_h = layer.height
         
         if box_w <= 0 or box_h <= 0:
-            # No constraints, use original size
-            overlay_resized = overlay
-            paste_x = layer.x
-            paste_y = layer.y
+            # No constraints, use original size (shrunk with the canvas of a proxy)
+            if scale == 1.0:
+                return overlay
+            size = (max(1, round(overlay.width * scale)), max(1, round(overlay.height * scale)))
+            return overlay.resize(size, Image.Resampling.LANCZOS, reducing_gap=self.REDUCING_GAP)
         elif layer.stretch:
             # Stretch: Ignore aspect ratio, fill the box exactly
-            overlay_resized = overlay.resize((box_w, box_h), Image.Resampling.LANCZOS)
-            paste_x = layer.x
-            paste_y = layer.y
+            return overlay.resize((box_w, box_h), Image.Resampling.LANCZOS, reducing_gap=self.REDUCING_GAP)
         else:
             # Aspect Fit logic
             img_w, img_h = overlay.size
@@ -385,16 +681,7 @@ class ImageCompositor:
             ratio_h = box_h / img_h
             scale = min(ratio_w, ratio_h)
             
-            target_w = int(img_w * scale)
-            target_h = int(img_h * scale)
-            
-            overlay_resized = overlay.resize((target_w, target_h), Image.Resampling.LANCZOS)
+            target_w = max(1, int(img_w * scale))
+            target_h = max(1, int(img_h * scale))
             
-            # Center in box
-            off_x = (box_w - target_w) // 2
-            off_y = (box_h - target_h) // 2
-            
-            paste_x = layer.x + off_x
-            paste_y = layer.y + off_y
-        
-        canvas.alpha_composite(overlay_resized, (paste_x, paste_y))
+            return overlay.resize((target_w, target_h), Image.Resampling.LANCZOS, reducing_gap=self.REDUCING_GAP)
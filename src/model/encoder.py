@@ -0,0 +1,98 @@
+import io
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from PIL import Image
+
+# Output format -> (file extension, Pillow format name)
+OUTPUT_FORMATS = {
+    "png": (".png", "PNG"),
+    "webp": (".webp", "WEBP"),                 # Lossy
+    "webp-lossless": (".webp", "WEBP"),
+    "jpg": (".jpg", "JPEG"),                   # No alpha, for opaque templates
+}
+
+PRESETS = ("fast", "balanced", "smallest")
+
+# Per format and preset, the Pillow save options. "balanced" is Pillow's default.
+_PRESET_OPTIONS = {
+    "png": {
+        "fast": {"compress_level": 1},
+        "balanced": {"compress_level": 6},
+        "smallest": {"compress_level": 9},
+    },
+    "webp": {
+        "fast": {"method": 0},
+        "balanced": {"method": 4},
+        "smallest": {"method": 6},
+    },
+    # For lossless WebP, quality is the compression effort
+    "webp-lossless": {
+        "fast": {"lossless": True, "quality": 0, "method": 0},
+        "balanced": {"lossless": True, "quality": 80, "method": 4},
+        "smallest": {"lossless": True, "quality": 100, "method": 6},
+    },
+    "jpg": {
+        "fast": {},
+        "balanced": {},
+        "smallest": {"optimize": True, "progressive": True},
+    },
+}
+
+DEFAULT_QUALITY = {"webp": 80, "jpg": 75} # Pillow's defaults
+
+
+@dataclass(frozen=True)
+class EncoderSettings:
+    format: str = "png"
+    preset: str = "balanced"
+    quality: Optional[int] = None # Lossy formats only, None = format default
+    optimize: bool = False        # Extra optimization pass (PNG, JPEG), slower to encode
+
+    def __post_init__(self):
+        if self.format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {self.format}")
+        if self.preset not in PRESETS:
+            raise ValueError(f"Unknown compression preset: {self.preset}")
+
+    @property
+    def extension(self) -> str:
+        return OUTPUT_FORMATS[self.format][0]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ImageEncoder:
+    """Saves rendered images with the given format, preset and quality."""
+
+    def __init__(self, settings: Optional[EncoderSettings] = None):
+        self.settings = settings or EncoderSettings()
+        self.pil_format = OUTPUT_FORMATS[self.settings.format][1]
+        self.options = self._save_options()
+
+    @property
+    def extension(self) -> str:
+        return self.settings.extension
+
+    def _save_options(self) -> dict:
+        settings = self.settings
+        options = dict(_PRESET_OPTIONS[settings.format][settings.preset])
+        if settings.format in DEFAULT_QUALITY:
+            options["quality"] = settings.quality if settings.quality is not None else DEFAULT_QUALITY[settings.format]
+        if settings.optimize and settings.format in ("png", "jpg"):
+            # PNG: also tries other filters at maximum compression
+            options["optimize"] = True
+        return options
+
+    def prepare(self, img: Image.Image) -> Image.Image:
+        if self.pil_format == "JPEG" and img.mode != "RGB":
+            # No alpha channel in JPEG
+            return img.convert("RGB")
+        return img
+
+    def encode(self, img: Image.Image) -> bytes:
+        """Encoded file contents."""
+        buffer = io.BytesIO()
+        self.prepare(img).save(buffer, self.pil_format, **self.options)
+        return buffer.getvalue()
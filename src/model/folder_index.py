@@ -0,0 +1,90 @@
+import os
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# Extensions tried for IMAGE_FOLDER layers, in order of preference
+DEFAULT_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+
+class FolderIndex:
+    """Index of the image files of artwork folders, keyed by rom name.
+
+    Each folder is listed once with scandir, then lookups are dictionary hits.
+    Matching is case-insensitive; when several files share a rom name the
+    extension listed first wins. A folder is listed again when its mtime
+    changes (checked at most every refresh_interval seconds).
+    """
+
+    def __init__(self, extensions: Iterable[str] = DEFAULT_IMAGE_EXTENSIONS, refresh_interval: float = 2.0):
+        self.extensions = tuple(self._normalize_ext(ext) for ext in extensions)
+        self.refresh_interval = refresh_interval
+        self._priority = {ext: i for i, ext in enumerate(self.extensions)}
+        # folder -> (folder mtime or None if missing, last check time, {rom key: file path})
+        self._folders: Dict[str, Tuple[Optional[int], float, Dict[str, str]]] = {}
+
+    @staticmethod
+    def _normalize_ext(ext: str) -> str:
+        ext = ext.strip().lower()
+        return ext if ext.startswith(".") else f".{ext}"
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        return name.lower()
+
+    def lookup(self, folder: str, rom_name: str) -> Optional[str]:
+        files = self._get_folder(folder)
+        if not files:
+            return None
+        return files.get(self.normalize_name(rom_name))
+
+    def invalidate(self, folder: Optional[str] = None):
+        if folder is None:
+            self._folders.clear()
+        else:
+            self._folders.pop(folder, None)
+
+    def _get_folder(self, folder: str) -> Dict[str, str]:
+        now = time.monotonic()
+        cached = self._folders.get(folder)
+        if cached is not None and now - cached[1] < self.refresh_interval:
+            return cached[2]
+
+        mtime = self._folder_mtime(folder)
+        if cached is not None and cached[0] == mtime:
+            self._folders[folder] = (mtime, now, cached[2])
+            return cached[2]
+
+        files = self._scan(folder) if mtime is not None else {}
+        self._folders[folder] = (mtime, now, files)
+        return files
+
+    @staticmethod
+    def _folder_mtime(folder: str) -> Optional[int]:
+        try:
+            return os.stat(folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self, folder: str) -> Dict[str, str]:
+        files = {}
+        best = {}
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    priority = self._priority.get(ext.lower())
+                    if priority is None:
+                        continue
+                    key = self.normalize_name(stem)
+                    if key in best and best[key] <= priority:
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    best[key] = priority
+                    files[key] = entry.path
+        except OSError:
+            pass
+        return files
@@ -0,0 +1,224 @@
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+from utils.files import write_atomic
+from utils.paths import get_cache_dir
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+INDEX_VERSION = 2
+
+# Style names that exactly describe a (bold, italic) variant, preferred over e.g. "Semibold"
+CANONICAL_STYLES = {
+    "regular": (False, False), "normal": (False, False), "book": (False, False), "roman": (False, False),
+    "bold": (True, False),
+    "italic": (False, True), "oblique": (False, True),
+    "bold italic": (True, True), "bold oblique": (True, True),
+}
+
+
+def system_font_dirs() -> List[str]:
+    """Font directories of the current platform plus the project assets/fonts folder."""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        dirs = [
+            os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+            os.path.join(os.environ.get("LOCALAPPDATA", home), "Microsoft", "Windows", "Fonts"),
+        ]
+    elif sys.platform == "darwin":
+        dirs = ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    else:
+        dirs = [
+            "/usr/share/fonts", "/usr/local/share/fonts",
+            os.path.join(home, ".fonts"), os.path.join(home, ".local", "share", "fonts"),
+        ]
+    dirs.append(os.path.abspath(os.path.join("assets", "fonts")))
+    return dirs
+
+
+def registry_font_files() -> List[str]:
+    """Font files registered in the Windows registry (machine and user), [] elsewhere."""
+    try:
+        import winreg
+    except ImportError:
+        return []
+
+    files = []
+    fonts_dir = os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts")
+    key_path = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\Fonts"
+    for hive in (winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER):
+        try:
+            with winreg.OpenKey(hive, key_path) as key:
+                count = winreg.QueryInfoKey(key)[1]
+                for i in range(count):
+                    try:
+                        _, filename, _ = winreg.EnumValue(key, i)
+                    except OSError:
+                        continue
+                    # Registry gives filename only usually, sometimes full path
+                    if not os.path.isabs(filename):
+                        filename = os.path.join(fonts_dir, filename)
+                    files.append(filename)
+        except OSError:
+            continue
+    return files
+
+
+def style_flags(style: str) -> Tuple[bool, bool, bool]:
+    """(bold, italic, canonical) for a font style name such as "Bold Italic"."""
+    style = style.lower().strip()
+    if style in CANONICAL_STYLES:
+        return CANONICAL_STYLES[style] + (True,)
+    return ("bold" in style, "italic" in style or "oblique" in style, False)
+
+
+class FontResolver:
+    """Resolves a font family + bold/italic to a font file.
+
+    Font directories (and registry fonts on Windows) are scanned once and the
+    family/style names read from the files are saved to an index in the user
+    cache dir. The index is reused as long as the mtimes of the scanned
+    directories are unchanged and no font directory appeared or disappeared,
+    so a warm start does not open any font file.
+    """
+
+    def __init__(self, font_dirs: Optional[List[str]] = None, cache_path: Optional[str] = None):
+        self.font_dirs = font_dirs if font_dirs is not None else system_font_dirs()
+        self._cache_path = cache_path
+        # family (lower case) -> "bold,italic" -> [path, face index, canonical]
+        self._families: Optional[Dict[str, Dict[str, list]]] = None
+        self._family_names: Dict[str, str] = {}
+
+    @property
+    def cache_path(self) -> str:
+        if self._cache_path is None:
+            self._cache_path = os.path.join(get_cache_dir(), "font_index.json")
+        return self._cache_path
+
+    def ensure_loaded(self):
+        if self._families is not None:
+            return
+
+        data = self._load_cache()
+        if data is None:
+            data = self._scan()
+            self._save_cache(data)
+        self._families = data["families"]
+        self._family_names = data["names"]
+
+    def families(self) -> List[str]:
+        self.ensure_loaded()
+        return sorted(self._family_names.values(), key=str.lower)
+
+    def resolve(self, family: str, bold: bool = False, italic: bool = False) -> Optional[Tuple[str, int]]:
+        """(path, face index) of the best match, falling back to another style of the family."""
+        self.ensure_loaded()
+        styles = self._families.get(family.lower().strip())
+        if not styles:
+            return None
+
+        for wanted in ((bold, italic), (bold, False), (False, False)):
+            match = styles.get(self._style_key(*wanted))
+            if match:
+                return match[0], match[1]
+
+        path, index, _ = next(iter(styles.values()))
+        return path, index
+
+    @staticmethod
+    def _style_key(bold: bool, italic: bool) -> str:
+        return f"{int(bold)},{int(italic)}"
+
+    # --- Index building and persistence ---
+
+    def _dir_mtimes(self, directories) -> Dict[str, Optional[int]]:
+        # None for a missing directory, so creating it later invalidates the index
+        mtimes = {}
+        for directory in directories:
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtimes[directory] = None
+        return mtimes
+
+    def _load_cache(self) -> Optional[dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != INDEX_VERSION or data.get("roots") != self.font_dirs:
+            return None
+        # Any added/removed font changes the mtime of the directory holding it
+        recorded = data.get("dirs", {})
+        if self._dir_mtimes(recorded) != recorded:
+            return None
+        return data
+
+    def _save_cache(self, data: dict):
+        try:
+            path = self.cache_path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, json.dumps(data).encode("utf-8"))
+        except OSError:
+            # The scanned index is still used in memory, the next run scans again
+            pass
+
+    def _scan(self) -> dict:
+        files = []
+        # Every configured root is recorded, existing or not
+        directories = list(self.font_dirs)
+        for root in self.font_dirs:
+            if not os.path.isdir(root):
+                continue
+            for dirpath, _, filenames in os.walk(root):
+                directories.append(dirpath)
+                files.extend(os.path.join(dirpath, name) for name in filenames
+                             if name.lower().endswith(FONT_EXTENSIONS))
+
+        known = {os.path.normcase(path) for path in files}
+        for path in registry_font_files():
+            if os.path.normcase(path) not in known and os.path.exists(path):
+                files.append(path)
+                directories.append(os.path.dirname(path))
+
+        families: Dict[str, Dict[str, list]] = {}
+        names: Dict[str, str] = {}
+        for path in files:
+            for index, (family, style) in self._read_faces(path):
+                bold, italic, canonical = style_flags(style)
+                key = family.lower()
+                names.setdefault(key, family)
+                styles = families.setdefault(key, {})
+                style_key = self._style_key(bold, italic)
+                current = styles.get(style_key)
+                # Keep "Bold" over "Semibold" etc. when both map to the same flags
+                if current is None or (canonical and not current[2]):
+                    styles[style_key] = [path, index, canonical]
+
+        return {
+            "version": INDEX_VERSION,
+            "roots": self.font_dirs,
+            "dirs": self._dir_mtimes(dict.fromkeys(directories)),
+            "families": families,
+            "names": names,
+        }
+
+    @staticmethod
+    def _read_faces(path: str) -> List[Tuple[int, Tuple[str, str]]]:
+        faces = []
+        # Collections (.ttc) hold several faces, plain font files only one
+        max_faces = 32 if path.lower().endswith(".ttc") else 1
+        for index in range(max_faces):
+            try:
+                font = ImageFont.truetype(path, 12, index=index)
+            except Exception:
+                break
+            family, style = font.getname()
+            if family:
+                faces.append((index, (family, style or "Regular")))
+        return faces
@@ -0,0 +1,145 @@
+import fnmatch
+import re
+import shlex
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, Iterable, Iterator, Optional, Sequence, Tuple
+
+from model.xml_parser import GameEntry, GameList
+
+_YEAR = re.compile(r"\s*(\d{4})")
+
+
+def load_rom_list(path: str) -> FrozenSet[str]:
+    """Rom names of a list file: one per line, blank lines and # comments ignored."""
+    names = set()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                names.add(line)
+    return frozenset(names)
+
+
+def parse_years(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """Year range (min, max), inclusive, from "1992", "1990-1995", "1990-" or "-1995"."""
+    low, sep, high = text.strip().partition("-")
+    try:
+        year_min = int(low) if low.strip() else None
+        year_max = int(high) if high.strip() else None
+        if not sep:
+            year_max = year_min
+    except ValueError:
+        raise ValueError(f"Invalid year range: {text!r} (expected e.g. 1992 or 1990-1995)")
+    if year_min is None and year_max is None:
+        raise ValueError(f"Invalid year range: {text!r} (expected e.g. 1992 or 1990-1995)")
+    return year_min, year_max
+
+
+def _glob_regex(patterns: Tuple[str, ...]):
+    # One case-insensitive regex for all the globs (fnmatch semantics)
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns), re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class GameFilter:
+    """Subset of a gamelist to render.
+
+    Rom selectors, the names of a list file (exact) and glob patterns on
+    rom_name, select games matching any of them; all games when there are
+    none. Field criteria must all hold: genre and manufacturer match one of
+    their globs (case-insensitive), the year lies in [year_min, year_max]
+    (games without a numeric year are left out once a bound is set).
+    """
+    rom_names: FrozenSet[str] = frozenset()
+    patterns: Tuple[str, ...] = ()
+    genres: Tuple[str, ...] = ()
+    manufacturers: Tuple[str, ...] = ()
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+
+    @classmethod
+    def parse(cls, text: str) -> "GameFilter":
+        """Filter from a one-line expression (GUI): rom globs separated by spaces,
+        plus genre:GLOB, manufacturer:GLOB, year:1990-1995 and roms:FILE terms.
+        Quote terms holding spaces: "genre:Beat'em Up"."""
+        lexer = shlex.shlex(text, posix=True)
+        lexer.whitespace_split = True
+        lexer.escape = "" # Keep Windows paths intact
+        rom_names, patterns, genres, manufacturers = set(), [], [], []
+        year_min = year_max = None
+        for term in lexer:
+            key, sep, value = term.partition(":")
+            key = key.lower()
+            if sep and key == "genre":
+                genres.append(value)
+            elif sep and key == "manufacturer":
+                manufacturers.append(value)
+            elif sep and key == "year":
+                year_min, year_max = parse_years(value)
+            elif sep and key == "roms":
+                rom_names |= load_rom_list(value)
+            else:
+                patterns.append(term)
+        return cls(frozenset(rom_names), tuple(patterns), tuple(genres), tuple(manufacturers), year_min, year_max)
+
+    @property
+    def is_empty(self) -> bool:
+        """True if every game is selected."""
+        return not (self.rom_names or self.patterns or self.genres or self.manufacturers
+                    or self.year_min is not None or self.year_max is not None)
+
+    def _row_test(self) -> Callable[[str, str, str, str], bool]:
+        """test(rom_name, year, genre, manufacturer), compiled once per selection."""
+        rom_names = self.rom_names
+        rom_regex = _glob_regex(self.patterns)
+        genre_regex = _glob_regex(self.genres)
+        manufacturer_regex = _glob_regex(self.manufacturers)
+        has_years = self.year_min is not None or self.year_max is not None
+        year_min = self.year_min if self.year_min is not None else -1
+        year_max = self.year_max if self.year_max is not None else 99999
+        select_roms = bool(rom_names or rom_regex)
+
+        def fields_match(year: str, genre: str, manufacturer: str) -> bool:
+            if genre_regex and not genre_regex.match(genre):
+                return False
+            if manufacturer_regex and not manufacturer_regex.match(manufacturer):
+                return False
+            if has_years:
+                match = _YEAR.match(year)
+                if not match or not year_min <= int(match.group(1)) <= year_max:
+                    return False
+            return True
+
+        # Year, genre and manufacturer take few distinct values: test each combination once
+        known = {}
+
+        def test(rom_name: str, year: str, genre: str, manufacturer: str) -> bool:
+            if select_roms and rom_name not in rom_names and not (rom_regex and rom_regex.match(rom_name)):
+                return False
+            key = (year, genre, manufacturer)
+            result = known.get(key)
+            if result is None:
+                result = known[key] = fields_match(year, genre, manufacturer)
+            return result
+
+        return test
+
+    def select(self, games: Iterable[GameEntry]) -> Iterator[GameEntry]:
+        """Matching games, lazily (works on streamed gamelists)."""
+        if self.is_empty:
+            return iter(games)
+        test = self._row_test()
+        return (game for game in games if test(game.rom_name, game.year, game.genre, game.manufacturer))
+
+    def apply(self, games: Sequence[GameEntry]) -> Sequence[GameEntry]:
+        """Matching games as a new sequence; a GameList is filtered on its columns."""
+        if self.is_empty:
+            return games
+        if isinstance(games, GameList):
+            test = self._row_test()
+            rows = zip(games.column("rom_name"), games.column("year"), games.column("genre"),
+                       games.column("manufacturer"))
+            return games.subset([index for index, row in enumerate(rows) if test(*row)])
+        return list(self.select(games))
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import marshal
+import os
+import struct
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from model.xml_parser import GAME_FIELDS, GameEntry, GameList, XMLParser
+from utils.files import AtomicFile
+from utils.paths import get_cache_dir
+
+CACHE_FORMAT = 2
+MAGIC = b"X2PG"
+CHUNK_GAMES = 4096 # Entries per marshalled chunk
+_HEADER = struct.Struct("<4sI") # magic, format
+_TRAILER = struct.Struct("<I")  # crc32 of everything between header and trailer
+
+
+class GamelistCache:
+    """On-disk cache of parsed gamelists, so opening a big XML again skips parsing.
+
+    One file per gamelist in the user cache dir, holding the GameEntry fields
+    as marshalled columns of strings, in chunks written while the XML is
+    streamed (memory stays flat), loaded back as a GameList. It is only
+    used when the XML path, size, mtime, the parser version and the backend
+    all match; a stale, truncated or corrupt file (magic, format or checksum
+    mismatch) is ignored and rewritten after the next parse.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self._cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache_dir(self) -> str:
+        if self._cache_dir is None:
+            self._cache_dir = get_cache_dir("gamelists")
+        return self._cache_dir
+
+    def _path(self, file_path: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.bin")
+
+    @staticmethod
+    def key(file_path: str, backend: str) -> Optional[tuple]:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.abspath(file_path), st.st_size, st.st_mtime_ns, XMLParser.VERSION, backend)
+
+    def load(self, file_path: str, backend: str) -> Optional[GameList]:
+        """The cached entries of an unchanged gamelist, or None."""
+        key = self.key(file_path, backend)
+        games = self._read(self._path(file_path), key) if key else None
+        if games is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return games
+
+    def _read(self, path: str, key: tuple) -> Optional[GameList]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if len(data) < _HEADER.size + _TRAILER.size:
+            return None
+        magic, fmt = _HEADER.unpack_from(data)
+        end = len(data) - _TRAILER.size
+        (crc,) = _TRAILER.unpack_from(data, end)
+        if magic != MAGIC or fmt != CACHE_FORMAT or zlib.crc32(memoryview(data)[_HEADER.size:end]) != crc:
+            return None
+
+        stream = io.BytesIO(data)
+        stream.seek(_HEADER.size)
+        columns = tuple([] for _ in GAME_FIELDS)
+        try:
+            if tuple(marshal.load(stream)) != key:
+                return None
+            while stream.tell() < end:
+                chunk = marshal.load(stream)
+                if len(chunk) != len(columns):
+                    return None
+                # Interned strings stay interned through marshal
+                for column, values in zip(columns, chunk):
+                    column.extend(values)
+        except (EOFError, ValueError, TypeError):
+            return None
+        return GameList(columns)
+
+    def save(self, key: tuple, games: Iterable[GameEntry]):
+        for _ in self._record(key, games):
+            pass
+
+    def recording(self, file_path: str, backend: str, entries: Iterator[GameEntry]) -> Iterator[GameEntry]:
+        """Pass entries through and save them once all have been read without error."""
+        # Stat before parsing: a file modified meanwhile gets a stale key, not stale entries
+        key = self.key(file_path, backend)
+        return self._record(key, entries) if key else entries
+
+    def _record(self, key: tuple, entries: Iterable[GameEntry]) -> Iterator[GameEntry]:
+        # Written chunk by chunk while streaming, so memory stays flat; the file
+        # only replaces the previous one once every entry has been read
+        writer = self._open_writer(key)
+        chunk = GameList()
+        try:
+            for game in entries:
+                yield game
+                if writer is None:
+                    continue
+                chunk.append(game)
+                if len(chunk) >= CHUNK_GAMES:
+                    writer = self._write_chunk(writer, chunk)
+                    chunk = GameList()
+            if writer is not None:
+                writer = self._write_chunk(writer, chunk)
+            if writer is not None:
+                try:
+                    writer.commit()
+                except OSError:
+                    writer.discard()
+                writer = None
+        finally:
+            # Parse error or abandoned iteration: no cache file
+            if writer is not None:
+                writer.discard()
+
+    def _open_writer(self, key: tuple) -> Optional["_CacheWriter"]:
+        try:
+            path = self._path(key[0])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return _CacheWriter(path, key)
+        except OSError:
+            # Unwritable cache dir: the XML is parsed again next time
+            return None
+
+    @staticmethod
+    def _write_chunk(writer: "_CacheWriter", games: GameList) -> Optional["_CacheWriter"]:
+        try:
+            writer.write_games(games)
+            return writer
+        except OSError:
+            writer.discard()
+            return None
+
+
+class _CacheWriter:
+    """A cache file being written: header, key, chunks of columns, crc32 trailer."""
+
+    def __init__(self, path: str, key: tuple):
+        self._file = AtomicFile(path)
+        self._crc = 0
+        try:
+            self._file.write(_HEADER.pack(MAGIC, CACHE_FORMAT))
+            self._write(marshal.dumps(key))
+        except BaseException:
+            self._file.discard()
+            raise
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._crc = zlib.crc32(data, self._crc)
+
+    def write_games(self, games: GameList):
+        self._write(marshal.dumps(tuple(games.column(name) for name in GAME_FIELDS)))
+
+    def commit(self):
+        self._file.write(_TRAILER.pack(self._crc))
+        self._file.commit()
+
+    def discard(self):
+        self._file.discard()
@@ -0,0 +1,82 @@
+import os
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from PIL import Image
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) for a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ImageCache:
+    """LRU cache of decoded PIL images, bounded by an approximate byte budget.
+
+    Cached images are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Image.Image]" = OrderedDict()
+        self._sizes = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def image_bytes(img: Image.Image) -> int:
+        return img.width * img.height * len(img.getbands())
+
+    def get(self, key: Hashable) -> Optional[Image.Image]:
+        img = self._entries.get(key)
+        if img is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return img
+
+    def put(self, key: Hashable, img: Image.Image):
+        size = self.image_bytes(img)
+        if size > self.max_bytes:
+            # Larger than the whole budget, caching it would just flush everything else
+            return
+
+        if key in self._entries:
+            self.current_bytes -= self._sizes.pop(key)
+            del self._entries[key]
+
+        self._entries[key] = img
+        self._sizes[key] = size
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes and self._entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self.current_bytes -= self._sizes.pop(old_key)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Optional[Image.Image]]) -> Optional[Image.Image]:
+        img = self.get(key)
+        if img is None:
+            img = loader()
+            if img is not None:
+                self.put(key, img)
+        return img
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
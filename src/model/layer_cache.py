@@ -0,0 +1,150 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from model.compositor import ImageCompositor, Layer, LayerType
+from model.image_cache import file_stamp
+from model.xml_parser import GameEntry
+
+Box = Tuple[int, int, int, int]
+
+
+@dataclass
+class LayerRaster:
+    signature: tuple
+    image: Optional[Image.Image] # Cropped to bbox, None if the layer paints nothing
+    bbox: Optional[Box]
+
+
+@dataclass
+class _CanvasState:
+    game: Optional[GameEntry]
+    rasters: List[Optional[LayerRaster]]
+    canvas: Optional[Image.Image] = None
+
+
+def _union(a: Optional[Box], b: Optional[Box]) -> Optional[Box]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _intersect(a: Box, b: Box) -> Optional[Box]:
+    box = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return None
+    return box
+
+
+class LayerRasterCache:
+    """Preview compositing that only re-renders the layers that changed.
+
+    For the previewed game, each layer's raster and bounding box are kept,
+    keyed by the layer's settings. On the next render only layers whose
+    settings changed are rasterized again, and only the union of their old
+    and new boxes is recomposited from the cached rasters below and above.
+    """
+    MAX_STATES = 2 # Proxy and full resolution previews alternate
+
+    def __init__(self, compositor: ImageCompositor):
+        self.compositor = compositor
+        self._states: "OrderedDict[Tuple[int, int], _CanvasState]" = OrderedDict()
+        self.hits = 0   # Layers reused from the cache
+        self.misses = 0 # Layers rasterized
+
+    def composit(self, game: Optional[GameEntry], layers: List[Layer], scale: float = 1.0) -> Image.Image:
+        """Same image as ImageCompositor.composit(). The result is owned by the
+        cache and updated in place by the next call: copy it to keep it."""
+        bg_layer = layers[0]
+        target_w, target_h = self.compositor.canvas_size(layers)
+        if scale != 1.0:
+            target_w = max(1, round(target_w * scale))
+            target_h = max(1, round(target_h * scale))
+            layers = [bg_layer] + [self.compositor.scale_layer(layer, scale) for layer in layers[1:]]
+        size = (target_w, target_h)
+
+        state = self._states.get(size)
+        if state is None or state.game != game or len(state.rasters) != len(layers):
+            # Another game (or template shape): nothing can be reused
+            state = _CanvasState(game, [None] * len(layers))
+            self._states[size] = state
+            while len(self._states) > self.MAX_STATES:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(size)
+
+        dirty = None
+        for index, layer in enumerate(layers):
+            signature = self._signature(index, layer, game)
+            old = state.rasters[index]
+            if old is not None and old.signature == signature:
+                self.hits += 1
+                continue
+
+            self.misses += 1
+            raster = self._rasterize(index, layer, game, size, signature, scale)
+            state.rasters[index] = raster
+            dirty = _union(dirty, _union(old.bbox if old else None, raster.bbox))
+
+        if state.canvas is None:
+            state.canvas = Image.new("RGBA", size, (0, 0, 0, 0))
+            dirty = (0, 0) + size
+        if dirty is not None:
+            self._recomposite(state, dirty)
+        return state.canvas
+
+    def clear(self):
+        self._states.clear()
+
+    def _signature(self, index: int, layer: Layer, game: Optional[GameEntry]) -> tuple:
+        signature = self.compositor._layer_signature(layer)
+        if index > 0 and layer.type == LayerType.IMAGE_FOLDER and layer.enabled and layer.visible:
+            # The artwork file may be added or replaced while the template is edited
+            path = self.compositor.find_folder_image(layer, game)
+            signature += (path, file_stamp(path) if path else None)
+        return signature
+
+    def _rasterize(self, index: int, layer: Layer, game: Optional[GameEntry],
+                   size: Tuple[int, int], signature: tuple, scale: float) -> LayerRaster:
+        if index == 0:
+            # Background: drawn when enabled and visible, stretched to the canvas
+            img = None
+            if layer.image_path and layer.enabled and layer.visible:
+                img = self.compositor._load_image(layer.image_path)
+                if img is not None and img.size != size:
+                    img = self.compositor._load_resized_background(layer.image_path, size)
+            if img is None:
+                return LayerRaster(signature, None, None)
+            return LayerRaster(signature, img, (0, 0) + size)
+
+        if not (layer.enabled and layer.visible):
+            return LayerRaster(signature, None, None)
+
+        canvas = Image.new("RGBA", size, (0, 0, 0, 0))
+        self.compositor._render_layer(canvas, ImageDraw.Draw(canvas), layer, game, scale)
+        bbox = canvas.getbbox()
+        if bbox is None:
+            return LayerRaster(signature, None, None)
+        return LayerRaster(signature, canvas.crop(bbox), bbox)
+
+    def _recomposite(self, state: _CanvasState, box: Box):
+        region = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), (0, 0, 0, 0))
+        for raster in state.rasters:
+            if raster is None or raster.bbox is None:
+                continue
+            part = _intersect(raster.bbox, box)
+            if part is None:
+                continue
+            dest = (part[0] - box[0], part[1] - box[1])
+            source = (part[0] - raster.bbox[0], part[1] - raster.bbox[1],
+                      part[2] - raster.bbox[0], part[3] - raster.bbox[1])
+            if raster is state.rasters[0]:
+                # The background replaces the transparent canvas, like composit() pastes it
+                region.paste(raster.image.crop(source), dest)
+            else:
+                region.alpha_composite(raster.image, dest, source)
+        state.canvas.paste(region, box[:2])
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from utils.files import write_atomic
+
+MANIFEST_NAME = ".xml2png_manifest.json"
+MANIFEST_VERSION = 1
+
+
+class RenderManifest:
+    """Fingerprint of every rendered output, stored next to the outputs.
+
+    A game whose fingerprint is unchanged and whose output file still exists
+    does not need to be rendered again.
+    """
+
+    def __init__(self, dest_folder: str):
+        self.path = os.path.join(dest_folder, MANIFEST_NAME)
+        self.entries: Dict[str, str] = {}
+        self.settings: dict = {}
+        self._dirty = False
+
+    def load(self) -> "RenderManifest":
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # Missing or unreadable manifest: everything is rendered again
+            return self
+
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = dict(data.get("games", {}))
+            self.settings = dict(data.get("settings", {}))
+        return self
+
+    def get(self, rom_name: str) -> Optional[str]:
+        return self.entries.get(rom_name)
+
+    def record(self, rom_name: str, fingerprint: str):
+        self.entries[rom_name] = fingerprint
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "settings": self.settings,
+            "games": self.entries,
+        }
+        # An interrupted save never leaves a truncated manifest
+        write_atomic(self.path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        self._dirty = False
+
+
+def fingerprint(template_digest: str, game_inputs: tuple) -> str:
+    return hashlib.sha1(f"{template_digest}|{game_inputs!r}".encode("utf-8")).hexdigest()
+
+
+def template_digest(template_signature: tuple, settings: dict) -> str:
+    payload = f"{MANIFEST_VERSION}|{template_signature!r}|{sorted(settings.items())!r}"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,115 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from PIL import Image
+
+from model.encoder import ImageEncoder
+from utils.files import write_atomic
+
+
+@dataclass
+class WriteResult:
+    token: Any # Whatever the caller passed to put(), e.g. the game
+    path: str
+    encode_time: float = 0.0
+    write_time: float = 0.0
+    output_bytes: int = 0
+    error: Optional[str] = None
+
+
+class OutputPipeline:
+    """Encodes and writes rendered images in background threads.
+
+    put() (compositing thread) -> encode thread -> write thread. Both queues
+    hold at most queue_depth items, so put() blocks when encoding or the disk
+    falls behind and memory stays bounded. Files are written under a temp
+    name and renamed, so a stopped or crashed run never leaves a truncated
+    image behind. Finished items are collected with completed() or flush().
+    """
+
+    def __init__(self, encoder: ImageEncoder, dest_folder: str, queue_depth: int = 4):
+        self.encoder = encoder
+        self.dest_folder = dest_folder
+        self._encode_queue = queue.Queue(maxsize=max(1, queue_depth))
+        self._write_queue = queue.Queue(maxsize=max(1, queue_depth))
+        self._done_queue = queue.Queue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        # Daemon threads: a worker process exiting never waits for them
+        self._threads = [
+            threading.Thread(target=self._encode_loop, name="xml2png-encode", daemon=True),
+            threading.Thread(target=self._write_loop, name="xml2png-write", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, name: str, img: Image.Image, token: Any = None):
+        """Queue img to be saved as {name}{ext}. Blocks while the queue is full."""
+        path = os.path.join(self.dest_folder, f"{name}{self.encoder.extension}")
+        with self._idle:
+            self._pending += 1
+        self._encode_queue.put((WriteResult(token, path), img))
+
+    def completed(self) -> List[WriteResult]:
+        """Results finished since the last call, without waiting."""
+        results = []
+        while True:
+            try:
+                results.append(self._done_queue.get_nowait())
+            except queue.Empty:
+                return results
+
+    def flush(self) -> List[WriteResult]:
+        """Wait until everything queued is written, then return the results."""
+        with self._idle:
+            while self._pending:
+                self._idle.wait()
+        return self.completed()
+
+    def close(self) -> List[WriteResult]:
+        """flush(), then stop the threads."""
+        results = self.flush()
+        self._encode_queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        return results
+
+    def _encode_loop(self):
+        while True:
+            item = self._encode_queue.get()
+            if item is None:
+                self._write_queue.put(None)
+                return
+            result, img = item
+            start = time.perf_counter()
+            try:
+                data = self.encoder.encode(img)
+            except Exception as e:
+                result.error = str(e)
+                data = None
+            result.encode_time = time.perf_counter() - start
+            del img, item # Free the canvas before blocking on a full write queue
+            self._write_queue.put((result, data))
+
+    def _write_loop(self):
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            result, data = item
+            if data is not None:
+                start = time.perf_counter()
+                try:
+                    write_atomic(result.path, data)
+                    result.output_bytes = len(data)
+                except Exception as e:
+                    result.error = str(e)
+                result.write_time = time.perf_counter() - start
+            self._done_queue.put(result)
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
@@ -0,0 +1,178 @@
+import csv
+import heapq
+import json
+import time
+from array import array
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# Returned by ImageCompositor._stage() when profiling is off: no timing, no allocation
+NO_STAGE = nullcontext()
+
+PERCENTILES = (50, 90, 99)
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    # Nearest rank
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(values) -> dict:
+    ordered = sorted(values)
+    total = sum(ordered)
+    summary = {"count": len(ordered), "total": total, "mean": total / len(ordered) if ordered else 0.0}
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = _percentile(ordered, pct)
+    summary["max"] = ordered[-1] if ordered else 0.0
+    return summary
+
+
+class RenderProfiler:
+    """Opt-in per-stage timings of a batch, per game and per layer.
+
+    Stages (decode, resize, text_layout, composite, encode, ...) are timed
+    while a game is open and summed per game, so percentiles describe the
+    cost of a stage for one image. Timings added outside a game (parsing,
+    fingerprinting) count as one sample each. Only the top slowest games are
+    kept, memory is a few floats per game and stage. The first build of a
+    cached plate (base_plate, overlay_plate) also includes the decode/resize
+    stages of the static layers it holds.
+    """
+
+    def __init__(self, top: int = 20):
+        self.top = top
+        self._stage_times: Dict[str, array] = {}
+        self._layer_times: Dict[Tuple[str, str], array] = {}
+        self._slowest: List[tuple] = [] # Min-heap of (total, rom_name, {stage: seconds})
+        self._open: Dict[Hashable, Dict[Tuple[Optional[str], str], float]] = {}
+        self._current = None
+        self.games = 0
+
+    @contextmanager
+    def game(self, rom_name: str):
+        """Stages timed inside are attributed to rom_name (until end_game)."""
+        self._current = rom_name
+        self._open.setdefault(rom_name, {})
+        try:
+            yield
+        finally:
+            self._current = None
+
+    @contextmanager
+    def stage(self, stage: str, layer: Optional[str] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, layer)
+
+    def add(self, stage: str, seconds: float, layer: Optional[str] = None, game: Optional[str] = None):
+        game = game if game is not None else self._current
+        if game is None:
+            self._samples(self._stage_times, stage).append(seconds)
+            return
+        times = self._open.setdefault(game, {})
+        key = (layer, stage)
+        times[key] = times.get(key, 0.0) + seconds
+
+    def end_game(self, rom_name: str):
+        """The game is fully done (written): fold its timings into the totals."""
+        times = self._open.pop(rom_name, None)
+        if not times:
+            return
+        self.games += 1
+
+        per_stage = {}
+        for (layer, stage), seconds in times.items():
+            per_stage[stage] = per_stage.get(stage, 0.0) + seconds
+            if layer is not None:
+                self._samples(self._layer_times, (layer, stage)).append(seconds)
+        for stage, seconds in per_stage.items():
+            self._samples(self._stage_times, stage).append(seconds)
+
+        entry = (sum(per_stage.values()), rom_name, per_stage)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif entry[0] > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @staticmethod
+    def _samples(table, key) -> array:
+        samples = table.get(key)
+        if samples is None:
+            samples = table[key] = array("d")
+        return samples
+
+    # --- Transfer between processes ---
+
+    def take(self) -> dict:
+        """Picklable copy of the finished games' timings, which are then cleared here."""
+        data = {
+            "games": self.games,
+            "stages": {stage: list(values) for stage, values in self._stage_times.items()},
+            "layers": [(layer, stage, list(values)) for (layer, stage), values in self._layer_times.items()],
+            "slowest": list(self._slowest),
+        }
+        self._stage_times.clear()
+        self._layer_times.clear()
+        self._slowest.clear()
+        self.games = 0
+        return data
+
+    def merge(self, data: dict):
+        """Add timings taken from another profiler (e.g. a worker process)."""
+        self.games += data["games"]
+        for stage, values in data["stages"].items():
+            self._samples(self._stage_times, stage).extend(values)
+        for layer, stage, values in data["layers"]:
+            self._samples(self._layer_times, (layer, stage)).extend(values)
+        for entry in data["slowest"]:
+            if len(self._slowest) < self.top:
+                heapq.heappush(self._slowest, entry)
+            elif entry[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    # --- Report ---
+
+    def report(self) -> dict:
+        layers: Dict[str, Dict[str, dict]] = {}
+        for (layer, stage), values in sorted(self._layer_times.items()):
+            layers.setdefault(layer, {})[stage] = summarize(values)
+
+        layer_totals = sorted(((sum(s["total"] for s in stages.values()), layer, stages)
+                               for layer, stages in layers.items()), reverse=True)
+        return {
+            "games": self.games,
+            "stages": {stage: summarize(values) for stage, values in sorted(self._stage_times.items())},
+            "layers": layers,
+            "slowest_games": [{"game": rom_name, "total": total, "stages": stages}
+                              for total, rom_name, stages in sorted(self._slowest, reverse=True)],
+            "slowest_layers": [{"layer": layer, "total": total,
+                                "stages": {stage: s["total"] for stage, s in stages.items()}}
+                               for total, layer, stages in layer_totals[:self.top]],
+        }
+
+    def write_report(self, path: str):
+        """Save report() as JSON, or as CSV rows when path ends with .csv."""
+        report = self.report()
+        if not path.lower().endswith(".csv"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            return
+
+        columns = ["count", "total", "mean"] + [f"p{pct}" for pct in PERCENTILES] + ["max"]
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["section", "name", "stage"] + columns)
+            for stage, summary in report["stages"].items():
+                writer.writerow(["stage", "", stage] + [summary[c] for c in columns])
+            for layer, stages in report["layers"].items():
+                for stage, summary in stages.items():
+                    writer.writerow(["layer", layer, stage] + [summary[c] for c in columns])
+            for game in report["slowest_games"]:
+                writer.writerow(["slowest_game", game["game"], "total", 1, game["total"]] + [""] * (len(columns) - 2))
+                for stage, seconds in game["stages"].items():
+                    writer.writerow(["slowest_game", game["game"], stage, 1, seconds] + [""] * (len(columns) - 2))
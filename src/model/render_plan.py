@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from model.compositor import Layer
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """One per-game drawing step of a RenderPlan."""
+    kind: str                                  # "text", "image", "folder" or "overlay"
+    layer: Optional["Layer"] = None            # Geometry and transform parameters, already scaled
+    text_field: Optional[Callable] = None      # attrgetter of the GameEntry field, None = static text
+    font_file: Optional[Tuple[str, int]] = None # Resolved (path, face index), None = load by name
+    image_stamp: Optional[tuple] = None        # Static image (mtime, size), checked at compile time
+    run: Tuple["Layer", ...] = ()              # Static images flattened into one overlay plate
+    plate_key: tuple = ()                      # Overlay plate cache key
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    """A layer list compiled by ImageCompositor.compile().
+
+    Holds everything that does not depend on the game: canvas size, active
+    layers only, resolved font files, text field accessors, checked static
+    image paths and plate cache keys. It is immutable and small, so it is
+    pickled once to each worker process.
+    """
+    size: Tuple[int, int]
+    background: "Layer"
+    draw_background: bool               # Enabled, visible and the image could be loaded
+    base_layers: Tuple["Layer", ...]    # Game-independent layers drawn once into the base plate
+    base_key: tuple
+    steps: Tuple[PlanStep, ...]
+    scale: float = 1.0                  # Proxy scale, already applied to the layers
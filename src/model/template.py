@@ -0,0 +1,53 @@
+import json
+from dataclasses import fields
+from enum import Enum
+from typing import List
+
+from model.compositor import Layer, LayerType, TextSource
+
+TEMPLATE_VERSION = 1
+
+
+def layer_to_dict(layer: Layer) -> dict:
+    data = {}
+    for f in fields(layer):
+        value = getattr(layer, f.name)
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, tuple):
+            value = list(value)
+        data[f.name] = value
+    return data
+
+
+def layer_from_dict(data: dict) -> Layer:
+    # Ignore unknown keys so templates from newer versions still load
+    known = {f.name for f in fields(Layer)}
+    values = {k: v for k, v in data.items() if k in known}
+
+    values["type"] = LayerType(values.get("type", LayerType.TEXT.value))
+    if "text_source" in values:
+        values["text_source"] = TextSource(values["text_source"])
+    if "font_color" in values:
+        values["font_color"] = tuple(values["font_color"])
+    return Layer(**values)
+
+
+def save_template(layers: List[Layer], path: str):
+    """Save the layer stack (Background + layers) as a JSON template."""
+    data = {
+        "version": TEMPLATE_VERSION,
+        "layers": [layer_to_dict(layer) for layer in layers],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_template(path: str) -> List[Layer]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    layers = [layer_from_dict(item) for item in data.get("layers", [])]
+    if not layers:
+        raise ValueError(f"Template has no layers: {path}")
+    return layers
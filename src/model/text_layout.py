@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Tuple
+
+from PIL import ImageFont
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    lines: Tuple[str, ...]
+    x_offsets: Tuple[float, ...] # Relative to the left of the layer box
+    widths: Tuple[float, ...]
+    line_height: int
+
+
+class TextLayoutEngine:
+    """Breaks text into lines using measured glyph advances.
+
+    Advances are cached per font, and finished layouts are memoized by
+    (text, font key, box width, alignment, wrap), so re-rendering the same
+    strings (preview refreshes, repeated values in a batch) skips layout.
+    """
+
+    def __init__(self, max_layouts: int = 4096):
+        self.max_layouts = max_layouts
+        self._layouts: "OrderedDict[tuple, TextLayout]" = OrderedDict()
+        self._advances: Dict[Hashable, Dict[str, float]] = {}
+        self._line_heights: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def layout(self, text: str, font: ImageFont.FreeTypeFont, font_key: Hashable,
+               box_width: int, align: str = "left", word_wrap: bool = True) -> TextLayout:
+        wrap = word_wrap and box_width > 0
+        key = (text, font_key, box_width, align, wrap)
+        cached = self._layouts.get(key)
+        if cached is not None:
+            self._layouts.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        lines = self._wrap(text, font, font_key, box_width) if wrap else [text]
+
+        # Exact widths (with kerning) for alignment, measured once per laid out line
+        widths = tuple(font.getlength(line) for line in lines)
+        if align == "center":
+            x_offsets = tuple((box_width - w) / 2 for w in widths)
+        elif align == "right":
+            x_offsets = tuple(box_width - w for w in widths)
+        else:
+            x_offsets = tuple(0 for _ in widths)
+
+        result = TextLayout(tuple(lines), x_offsets, widths, self.line_height(font, font_key))
+        self._layouts[key] = result
+        while len(self._layouts) > self.max_layouts:
+            self._layouts.popitem(last=False)
+        return result
+
+    def line_height(self, font: ImageFont.FreeTypeFont, font_key: Hashable) -> int:
+        height = self._line_heights.get(font_key)
+        if height is None:
+            # Use font metric for line height
+            bbox = font.getbbox("Tg")
+            height = int(bbox[3] - bbox[1] + 4)
+            self._line_heights[font_key] = height
+        return height
+
+    def _advance(self, text: str, font: ImageFont.FreeTypeFont, font_key: Hashable) -> float:
+        advances = self._advances.get(font_key)
+        if advances is None:
+            advances = self._advances[font_key] = {}
+
+        total = 0.0
+        for ch in text:
+            adv = advances.get(ch)
+            if adv is None:
+                adv = advances[ch] = font.getlength(ch)
+            total += adv
+        return total
+
+    def _wrap(self, text: str, font: ImageFont.FreeTypeFont, font_key: Hashable, box_width: int) -> List[str]:
+        # Same whitespace handling as textwrap: split on any whitespace, single spaces between words
+        space = self._advance(" ", font, font_key)
+        lines = []
+        current = ""
+        current_width = 0.0
+
+        for word in text.split():
+            word_width = self._advance(word, font, font_key)
+
+            if current and current_width + space + word_width <= box_width:
+                current += " " + word
+                current_width += space + word_width
+                continue
+
+            if current:
+                lines.append(current)
+
+            if word_width <= box_width:
+                current, current_width = word, word_width
+            else:
+                # Word wider than the box: break it where it overflows
+                pieces = self._break_word(word, font, font_key, box_width)
+                lines.extend(pieces[:-1])
+                current = pieces[-1]
+                current_width = self._advance(current, font, font_key)
+
+        if current:
+            lines.append(current)
+        return lines
+
+    def _break_word(self, word: str, font: ImageFont.FreeTypeFont, font_key: Hashable, box_width: int) -> List[str]:
+        pieces = []
+        piece = ""
+        width = 0.0
+        for ch in word:
+            adv = self._advance(ch, font, font_key)
+            if piece and width + adv > box_width:
+                pieces.append(piece)
+                piece, width = "", 0.0
+            piece += ch
+            width += adv
+        pieces.append(piece)
+        return pieces
+
+    def clear(self):
+        self._layouts.clear()
+        self._advances.clear()
+        self._line_heights.clear()
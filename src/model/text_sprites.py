@@ -0,0 +1,96 @@
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from model.image_cache import ImageCache
+
+# (coverage mask, offset of the mask from the text position), mask None for blank text
+TextSprite = Tuple[Optional[Image.Image], Tuple[int, int]]
+
+
+class _SpriteStore(ImageCache):
+    """ImageCache holding sprites, sized by their mask."""
+
+    @staticmethod
+    def image_bytes(sprite: TextSprite) -> int:
+        mask = sprite[0]
+        return mask.width * mask.height if mask else 0
+
+
+class TextSpriteCache:
+    """LRU cache of rasterized text lines, bounded by an approximate byte budget.
+
+    Fields such as year, genre or manufacturer only take a few dozen values
+    over a whole gamelist: their lines are rasterized by FreeType once and
+    then blitted from the cached coverage mask. Masks are "L" images drawn
+    with ImageDraw.text() itself, and ImageDraw.bitmap() blends them the same
+    way text() blends glyphs, so the output is unchanged. Colour is applied
+    when blitting, one mask serves every colour and box of a font.
+    Entries live in an ImageCache (LRU by byte budget); hits and misses are
+    counted here per layer. max_bytes = 0 disables the cache.
+    """
+
+    PADDING = 2 # Around the font bbox, for glyphs that spill over it
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self._sprites = _SpriteStore(max_bytes)
+        self._layer_stats: Dict[str, List[int]] = {} # layer name -> [hits, misses]
+
+    @property
+    def enabled(self) -> bool:
+        return self._sprites.max_bytes > 0
+
+    def get(self, line: str, font: ImageFont.FreeTypeFont, font_key: Hashable, start: float,
+            layer_name: str) -> TextSprite:
+        """Sprite of a line drawn with its integer position at the origin.
+        start is the fractional part of the x position (sub-pixel glyph placement)."""
+        key = (line, font_key, start)
+        stats = self._layer_stats.setdefault(layer_name, [0, 0])
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            stats[0] += 1
+            return sprite
+
+        stats[1] += 1
+        sprite = self._rasterize(line, font, start)
+        self._sprites.put(key, sprite)
+        return sprite
+
+    def _rasterize(self, line: str, font: ImageFont.FreeTypeFont, start: float) -> TextSprite:
+        x0, y0, x1, y1 = font.getbbox(line)
+        # Keep the drawing position positive so text() sees the same sub-pixel start
+        origin_x = max(0, -x0) + self.PADDING
+        origin_y = max(0, -y0) + self.PADDING
+        size = (origin_x + max(0, x1) + 2 * self.PADDING, origin_y + max(0, y1) + 2 * self.PADDING)
+
+        mask = Image.new("L", size, 0)
+        ImageDraw.Draw(mask).text((origin_x + start, origin_y), line, font=font, fill=255)
+        bbox = mask.getbbox()
+        if bbox is None:
+            return None, (0, 0)
+        return mask.crop(bbox), (bbox[0] - origin_x, bbox[1] - origin_y)
+
+    def clear(self):
+        self._sprites.clear()
+
+    def take_stats(self) -> Dict[str, List[int]]:
+        """Per-layer [hits, misses] since the last call."""
+        stats, self._layer_stats = self._layer_stats, {}
+        return stats
+
+    @staticmethod
+    def merge_stats(total: Dict[str, List[int]], stats: Dict[str, List[int]]):
+        for layer_name, (hits, misses) in stats.items():
+            counts = total.setdefault(layer_name, [0, 0])
+            counts[0] += hits
+            counts[1] += misses
+
+    @staticmethod
+    def format_stats(stats: Dict[str, List[int]]) -> str:
+        """Hit rates as "Year 98% (49/50), ...", for summaries."""
+        parts = []
+        for layer_name, (hits, misses) in sorted(stats.items()):
+            lookups = hits + misses
+            if lookups:
+                parts.append(f"{layer_name} {hits / lookups:.0%} ({hits}/{lookups})")
+        return ", ".join(parts)
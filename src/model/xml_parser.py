@@ -1,9 +1,24 @@
 import xml.etree.ElementTree as ET
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, fields
+from sys import intern
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import os
 
-@dataclass
+if TYPE_CHECKING:
+    from model.gamelist_cache import GamelistCache
+
+try:
+    # Faster C parser, and its recover mode tolerates slightly broken scraper output
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+# Comments and processing instructions are skipped like ElementTree does; entities
+# are not resolved and nothing is fetched, so a gamelist cannot pull in other files.
+_LXML_OPTIONS = dict(recover=True, huge_tree=True, remove_comments=True, remove_pis=True,
+                     resolve_entities=False, no_network=True)
+
+@dataclass(slots=True) # No per-instance __dict__: big gamelists hold 100k+ entries
 class GameEntry:
     rom_name: str # Filename without extension (used for output file)
     display_name: str # <name> tag content (used for Text Name)
@@ -11,91 +26,265 @@ class GameEntry:
     year: str = ""
     genre: str = ""
     manufacturer: str = ""
-    
-    # Store original name/path just in case? 
+
+    # Store original name/path just in case?
     # For ES: path="./roms/mario.zip" -> rom_name="mario"
     # For HS: name="mario" -> rom_name="mario"
 
+
+GAME_FIELDS = tuple(f.name for f in fields(GameEntry))
+# Fields with a few dozen distinct values per gamelist: one shared string object per value
+INTERNED_FIELDS = ("year", "genre", "manufacturer")
+
+
+class GameList:
+    """Column-oriented list of games, for big gamelists.
+
+    Holds one list of strings per GameEntry field instead of one object per
+    game (low-cardinality fields interned), and builds GameEntry objects on
+    access: indexing, slicing (gives a GameList) and iteration work like on
+    a list of entries. Entries are copies, changing one does not change the
+    list. Pickles as a few lists, where repeated strings are written once.
+    """
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns: Optional[Tuple[List[str], ...]] = None):
+        self._columns = columns if columns is not None else tuple([] for _ in GAME_FIELDS)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[GameEntry]) -> "GameList":
+        if isinstance(entries, GameList):
+            return entries
+        games = cls()
+        for game in entries:
+            games.append(game)
+        return games
+
+    def append(self, game: GameEntry):
+        for column, name in zip(self._columns, GAME_FIELDS):
+            value = getattr(game, name)
+            column.append(intern(value) if name in INTERNED_FIELDS else value)
+
+    def subset(self, indices: Iterable[int]) -> "GameList":
+        """The games at the given indices, in that order."""
+        indices = list(indices)
+        return GameList(tuple([column[i] for i in indices] for column in self._columns))
+
+    def column(self, name: str) -> List[str]:
+        """Values of one field for every game (the list itself, do not modify)."""
+        return self._columns[GAME_FIELDS.index(name)]
+
+    def __len__(self) -> int:
+        return len(self._columns[0])
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return GameList(tuple(column[index] for column in self._columns))
+        return GameEntry(*(column[index] for column in self._columns))
+
+    def __iter__(self) -> Iterator[GameEntry]:
+        return map(GameEntry, *self._columns)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, GameList):
+            return self._columns == other._columns
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"<GameList of {len(self)} games>"
+
+    def __getstate__(self):
+        return self._columns
+
+    def __setstate__(self, columns):
+        self._columns = columns
+
+
 class XMLParser:
+    # "lxml" when installed, else "etree" (xml.etree.ElementTree, no recover mode)
+    BACKEND = "lxml" if lxml_etree is not None else "etree"
+    # Bump when the entries extracted from a file change: invalidates GamelistCache files
+    VERSION = 1
+
+    @staticmethod
+    def parse(file_path: str, backend: Optional[str] = None,
+              cache: Optional["GamelistCache"] = None) -> List[GameEntry]:
+        return list(XMLParser.iter_games(file_path, backend, cache))
+
     @staticmethod
-    def parse(file_path: str) -> List[GameEntry]:
+    def parse_compact(file_path: str, backend: Optional[str] = None,
+                      cache: Optional["GamelistCache"] = None) -> GameList:
+        """Same games as parse(), in a GameList (much smaller for big gamelists)."""
+        return GameList.from_entries(XMLParser.iter_games(file_path, backend, cache))
+
+    @staticmethod
+    def iter_games(file_path: str, backend: Optional[str] = None,
+                   cache: Optional["GamelistCache"] = None) -> Iterable[GameEntry]:
+        """Stream GameEntry objects as each <game> element is closed.
+
+        Processed elements are discarded, so memory stays flat whatever the
+        size of the gamelist. The file and its format are checked before
+        returning; later XML errors are raised as ValueError while iterating.
+        Both backends give the same entries for well-formed files.
+        With a cache, an unchanged file is loaded from it instead (returned
+        as a GameList); otherwise the entries are also written to the cache
+        as they are streamed, the file is kept once fully read.
+        """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"XML file not found: {file_path}")
-            
-        try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-        except ET.ParseError as e:
-            raise ValueError(f"Invalid XML file: {e}")
+
+        backend = backend or XMLParser.BACKEND
+        if cache is not None:
+            games = cache.load(file_path, backend)
+            if games is not None:
+                return games
+
+        if backend == "lxml":
+            root_tag, game_nodes = XMLParser._open_lxml(file_path)
+        elif backend == "etree":
+            root_tag, game_nodes = XMLParser._open_etree(file_path)
+        else:
+            raise ValueError(f"Unknown XML backend: {backend}")
 
         # Detect format based on root tag
-        if root.tag == 'menu':
-             return XMLParser._parse_hyperspin(root)
-        elif root.tag == 'gameList':
-             return XMLParser._parse_emulationstation(root)
+        if root_tag == 'menu':
+             make_entry = XMLParser._hyperspin_entry
+        elif root_tag == 'gameList':
+             make_entry = XMLParser._emulationstation_entry
         else:
             # Fallback or unknown
-             raise ValueError(f"Unknown XML format. Root tag: {root.tag}")
+             raise ValueError(f"Unknown XML format. Root tag: {root_tag}")
+
+        entries = (entry for entry in map(make_entry, game_nodes) if entry is not None)
+        return cache.recording(file_path, backend, entries) if cache is not None else entries
 
     @staticmethod
-    def _parse_hyperspin(root: ET.Element) -> List[GameEntry]:
-        games = []
-        for game_node in root.findall('game'):
-            name = game_node.get('name', '')
-            
-            # Skip header or non-game entries if any
-            if not name: 
-                continue
-
-            desc = game_node.findtext('description', '')
-            year = game_node.findtext('year', '')
-            genre = game_node.findtext('genre', '')
-            manufacturer = game_node.findtext('manufacturer', '')
-
-            games.append(GameEntry(
-                rom_name=name, # HS uses name as the key/filename usually
-                display_name=name, # HS <description> acts as full name sometimes? No, HS has <description> separate
-                description=desc,
-                year=year,
-                genre=genre,
-                manufacturer=manufacturer
-            ))
-        return games
+    def _open_etree(file_path: str) -> Tuple[str, Iterator[ET.Element]]:
+        """Root tag and the <game> children of the root, with ElementTree."""
+        context = ET.iterparse(file_path, events=("start", "end"))
+        try:
+            _, root = next(context)
+        except (ET.ParseError, StopIteration) as e:
+            raise ValueError(f"Invalid XML file: {e}")
+        return root.tag, XMLParser._etree_games(context, root)
 
     @staticmethod
-    def _parse_emulationstation(root: ET.Element) -> List[GameEntry]:
-        games = []
-        for game_node in root.findall('game'):
-            path = game_node.findtext('path', '')
-            name = game_node.findtext('name', '') 
-            # In ES, <name> is the display name, <path> implies the filename.
-            # Usually for assets we want the filename (without extension) matches.
-            
-            if not path:
-                # Some ES implementations might rely on just name? Rare.
-                continue
-
-            # Extract filename from path: ./roms/game.zip -> game
-            basename = os.path.basename(path)
-            rom_name = os.path.splitext(basename)[0]
-
-            desc = game_node.findtext('desc', '')
-            
-            # Dates in ES are usually "YYYYMMDDT..."
-            releasedate = game_node.findtext('releasedate', '')
-            year = releasedate[:4] if releasedate and len(releasedate) >= 4 else ""
-
-            genre = game_node.findtext('genre', '')
-            developer = game_node.findtext('developer', '') 
-            publisher = game_node.findtext('publisher', '')
-            manufacturer = developer if developer else publisher
-
-            games.append(GameEntry(
-                rom_name=rom_name,
-                display_name=name if name else rom_name,
-                description=desc if desc else name, # Fallback to name if desc empty
-                year=year,
-                genre=genre,
-                manufacturer=manufacturer
-            ))
-        return games
+    def _etree_games(context, root: ET.Element) -> Iterator[ET.Element]:
+        depth = 1 # Root start event already consumed
+        try:
+            for event, elem in context:
+                if event == "start":
+                    depth += 1
+                    continue
+
+                depth -= 1
+                if depth != 1:
+                    continue
+
+                # A direct child of the root has been fully read
+                if elem.tag == 'game':
+                    yield elem
+                root.clear()
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid XML file: {e}")
+
+    @staticmethod
+    def _open_lxml(file_path: str) -> Tuple[str, Iterator["lxml_etree._Element"]]:
+        """Root tag and the <game> children of the root, with lxml."""
+        if lxml_etree is None:
+            raise ValueError("The lxml XML backend is not installed")
+        try:
+            # Only reads up to the root start tag; games are streamed by a second parser
+            _, root = next(lxml_etree.iterparse(file_path, events=("start",), **_LXML_OPTIONS))
+        except lxml_etree.LxmlError as e:
+            raise ValueError(f"Invalid XML file: {e}")
+        except StopIteration:
+            # Recover mode found nothing that looks like XML
+            raise ValueError("Invalid XML file: no root element")
+        # Only <game> end events reach Python, which is most of the speedup over ElementTree
+        context = lxml_etree.iterparse(file_path, events=("end",), tag="game", **_LXML_OPTIONS)
+        return root.tag, XMLParser._lxml_games(context)
+
+    @staticmethod
+    def _lxml_games(context) -> Iterator["lxml_etree._Element"]:
+        try:
+            for _, elem in context:
+                parent = elem.getparent()
+                if parent is None or parent.getparent() is not None:
+                    continue # Not a direct child of the root
+                yield elem
+                # Drop this game and whatever preceded it
+                elem.clear(keep_tail=True)
+                while elem.getprevious() is not None:
+                    del parent[0]
+        except lxml_etree.LxmlError as e:
+            raise ValueError(f"Invalid XML file: {e}")
+
+    @staticmethod
+    def _child_texts(game_node: ET.Element) -> Dict[str, str]:
+        """Text of each child in one pass, the first one wins for repeated tags (like findtext)."""
+        texts = {}
+        for child in game_node:
+            tag = child.tag
+            if tag not in texts:
+                texts[tag] = child.text or ""
+        return texts
+
+    @staticmethod
+    def _hyperspin_entry(game_node: ET.Element) -> Optional[GameEntry]:
+        name = game_node.get('name', '')
+
+        # Skip header or non-game entries if any
+        if not name:
+            return None
+
+        texts = XMLParser._child_texts(game_node)
+        desc = texts.get('description', '')
+        year = texts.get('year', '')
+        genre = texts.get('genre', '')
+        manufacturer = texts.get('manufacturer', '')
+
+        return GameEntry(
+            rom_name=name, # HS uses name as the key/filename usually
+            display_name=name, # HS <description> acts as full name sometimes? No, HS has <description> separate
+            description=desc,
+            year=intern(year),
+            genre=intern(genre),
+            manufacturer=intern(manufacturer)
+        )
+
+    @staticmethod
+    def _emulationstation_entry(game_node: ET.Element) -> Optional[GameEntry]:
+        texts = XMLParser._child_texts(game_node)
+        path = texts.get('path', '')
+        name = texts.get('name', '')
+        # In ES, <name> is the display name, <path> implies the filename.
+        # Usually for assets we want the filename (without extension) matches.
+
+        if not path:
+            # Some ES implementations might rely on just name? Rare.
+            return None
+
+        # Extract filename from path: ./roms/game.zip -> game
+        basename = os.path.basename(path)
+        rom_name = os.path.splitext(basename)[0]
+
+        desc = texts.get('desc', '')
+
+        # Dates in ES are usually "YYYYMMDDT..."
+        releasedate = texts.get('releasedate', '')
+        year = releasedate[:4] if releasedate and len(releasedate) >= 4 else ""
+
+        genre = texts.get('genre', '')
+        developer = texts.get('developer', '')
+        publisher = texts.get('publisher', '')
+        manufacturer = developer if developer else publisher
+
+        return GameEntry(
+            rom_name=rom_name,
+            display_name=name if name else rom_name,
+            description=desc if desc else name, # Fallback to name if desc empty
+            year=intern(year),
+            genre=intern(genre),
+            manufacturer=intern(manufacturer)
+        )
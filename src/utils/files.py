@@ -0,0 +1,40 @@
+import os
+
+
+class AtomicFile:
+    """Binary file written under a temp name next to path.
+
+    commit() renames it into place, discard() removes it: readers of path
+    never see a partial file, an interrupted write leaves the previous
+    version (or nothing).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._file = open(self.tmp_path, "wb")
+
+    def write(self, data: bytes):
+        self._file.write(data)
+
+    def commit(self):
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+def write_atomic(path: str, data: bytes):
+    """Write data to a temp file next to path, then rename it into place."""
+    output = AtomicFile(path)
+    try:
+        output.write(data)
+        output.commit()
+    except BaseException:
+        output.discard()
+        raise
@@ -0,0 +1,18 @@
+import os
+import sys
+
+
+def get_cache_dir(*parts: str) -> str:
+    """Per-user cache directory for xml2png.
+
+    Not created here: callers create it when they write to it, inside their
+    own error handling, so an unwritable cache location only disables caching.
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+    return os.path.join(base, "xml2png", *parts)
@@ -33,6 +33,7 @@ class LayerControlWidget(QWidget):
         self.combo_type.addItem("Text Genre", TextSource.GENRE)
         self.combo_type.addItem("Text Year", TextSource.YEAR)
         self.combo_type.addItem("Text Manufacturer", TextSource.MANUFACTURER)
+        self.combo_type.addItem("Text Custom (Prefix/Suffix)", TextSource.CUSTOM)
         self.combo_type.addItem("Picture File (Static)", LayerType.IMAGE)
         self.combo_type.addItem("Picture Folder (Variable)", LayerType.IMAGE_FOLDER)
         type_layout.addWidget(self.combo_type)
@@ -268,8 +269,9 @@ class LayerControlWidget(QWidget):
                 elif layer.text_source == TextSource.GENRE: idx = 3
                 elif layer.text_source == TextSource.YEAR: idx = 4
                 elif layer.text_source == TextSource.MANUFACTURER: idx = 5
-            elif layer.type == LayerType.IMAGE: idx = 6
-            elif layer.type == LayerType.IMAGE_FOLDER: idx = 7
+                elif layer.text_source == TextSource.CUSTOM: idx = 6
+            elif layer.type == LayerType.IMAGE: idx = 7
+            elif layer.type == LayerType.IMAGE_FOLDER: idx = 8
         
         self.combo_type.setCurrentIndex(idx)
         
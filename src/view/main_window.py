@@ -1,6 +1,6 @@
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-    QLabel, QLineEdit, QFileDialog, QProgressBar, QMessageBox
+    QLabel, QLineEdit, QFileDialog, QProgressBar, QMessageBox, QSpinBox, QCheckBox, QComboBox
 )
 from PyQt6.QtCore import pyqtSignal
 
@@ -8,6 +8,7 @@ from view.preview_widget import PreviewWidget
 from view.layer_controls import LayerControlWidget
 from view.layer_list_widget import LayerListWidget
 from model.compositor import Layer, LayerType
+import os
 
 class MainWindow(QMainWindow):
     # Signals
@@ -16,6 +17,9 @@ class MainWindow(QMainWindow):
     generate_clicked = pyqtSignal()
     layer_selected = pyqtSignal(int) # index 0=BG, 1=Layer1...
     layer_visibility_toggled = pyqtSignal(int, bool)  # index, is_visible
+    template_save_requested = pyqtSignal(str)  # path
+    template_load_requested = pyqtSignal(str)  # path
+    count_selection_requested = pyqtSignal()
 
     def __init__(self):
         super().__init__()
@@ -58,6 +62,16 @@ class MainWindow(QMainWindow):
         right_layout.addLayout(self._create_file_picker("Select XML File:", self.xml_path_changed, is_folder=False))
         # Destination
         right_layout.addLayout(self._create_file_picker("Select Destination:", self.dest_path_changed, is_folder=True))
+
+        # Layer template (also used by the headless `render` command)
+        template_layout = QHBoxLayout()
+        self.btn_load_template = QPushButton("Load Template...")
+        self.btn_save_template = QPushButton("Save Template...")
+        self.btn_load_template.clicked.connect(self._pick_template_to_load)
+        self.btn_save_template.clicked.connect(self._pick_template_to_save)
+        template_layout.addWidget(self.btn_load_template)
+        template_layout.addWidget(self.btn_save_template)
+        right_layout.addLayout(template_layout)
         
         right_layout.addSpacing(10)
 
@@ -79,6 +93,61 @@ class MainWindow(QMainWindow):
         right_layout.addStretch()
 
         # 4. Action
+        workers_layout = QHBoxLayout()
+        workers_layout.addWidget(QLabel("Render Processes:"))
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(1, 64)
+        self.spin_workers.setValue(os.cpu_count() or 1)
+        self.spin_workers.setToolTip("Number of processes used for batch generation (1 = no multiprocessing).")
+        workers_layout.addWidget(self.spin_workers)
+        right_layout.addLayout(workers_layout)
+
+        output_layout = QHBoxLayout()
+        output_layout.addWidget(QLabel("Output:"))
+        self.combo_output_format = QComboBox()
+        self.combo_output_format.addItem("PNG", "png")
+        self.combo_output_format.addItem("WebP (lossy)", "webp")
+        self.combo_output_format.addItem("WebP (lossless)", "webp-lossless")
+        self.combo_output_format.addItem("JPEG (no transparency)", "jpg")
+        output_layout.addWidget(self.combo_output_format)
+        self.combo_compression = QComboBox()
+        self.combo_compression.addItem("Fast", "fast")
+        self.combo_compression.addItem("Balanced", "balanced")
+        self.combo_compression.addItem("Smallest", "smallest")
+        self.combo_compression.setCurrentIndex(1)
+        self.combo_compression.setToolTip("Compression preset: encoding speed vs file size.")
+        output_layout.addWidget(self.combo_compression)
+        right_layout.addLayout(output_layout)
+
+        self.chk_force_rebuild = QCheckBox("Force full rebuild")
+        self.chk_force_rebuild.setToolTip("Re-render every image, even those unchanged since the last generation.")
+        right_layout.addWidget(self.chk_force_rebuild)
+
+        # Opt-in per-stage timings of the next generations (same report as `render --profile`)
+        self.profile_report_path = ""
+        self.chk_profile = QCheckBox("Write a timing report")
+        self.chk_profile.setToolTip("Time every stage per game and layer while generating, and save a report (.json or .csv).")
+        self.chk_profile.toggled.connect(self._on_profile_toggled)
+        right_layout.addWidget(self.chk_profile)
+
+        # Selection: only render the matching games
+        selection_layout = QHBoxLayout()
+        selection_layout.addWidget(QLabel("Only:"))
+        self.edit_selection = QLineEdit()
+        self.edit_selection.setPlaceholderText("All games, or e.g. sonic* genre:Platform year:1990-1995")
+        self.edit_selection.setToolTip(
+            "Games to render, empty = all.\n"
+            "Rom name patterns separated by spaces (sonic* mk?), any of them,\n"
+            "roms:list.txt for a rom list file (one name per line),\n"
+            "and criteria that must all match: genre:Platform manufacturer:Sega* year:1990-1995.\n"
+            "Quote terms holding spaces: \"genre:Beat'em Up\".")
+        selection_layout.addWidget(self.edit_selection)
+        self.btn_count_selection = QPushButton("Count")
+        self.btn_count_selection.setToolTip("Count the selected games and those that need rendering.")
+        self.btn_count_selection.clicked.connect(self.count_selection_requested.emit)
+        selection_layout.addWidget(self.btn_count_selection)
+        right_layout.addLayout(selection_layout)
+
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
         right_layout.addWidget(self.progress_bar)
@@ -117,6 +186,33 @@ class MainWindow(QMainWindow):
         v.setSpacing(2)
         return v
 
+    def _pick_template_to_load(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load Template", filter="Template Files (*.json);;All Files (*)")
+        if path:
+            self.template_load_requested.emit(path)
+
+    def _pick_template_to_save(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Template", filter="Template Files (*.json)")
+        if path:
+            if not path.lower().endswith(".json"):
+                path += ".json"
+            self.template_save_requested.emit(path)
+
+    def _on_profile_toggled(self, checked):
+        if checked and not self.profile_report_path:
+            path, _ = QFileDialog.getSaveFileName(self, "Timing Report",
+                                                  filter="JSON Report (*.json);;CSV Report (*.csv)")
+            if not path:
+                self.chk_profile.setChecked(False)
+                return
+            if not path.lower().endswith((".json", ".csv")):
+                path += ".json"
+            self.profile_report_path = path
+            self.chk_profile.setText(f"Write a timing report ({os.path.basename(path)})")
+        elif not checked:
+            self.profile_report_path = ""
+            self.chk_profile.setText("Write a timing report")
+
     def _on_layer_changed(self, index):
         self.layer_selected.emit(index)
     
@@ -3,82 +3,154 @@ from PyQt6.QtGui import QPixmap, QImage, QPainter, QPen, QColor
 from PyQt6.QtCore import Qt, QRect
 from PIL import Image
 
+
+def pil_to_qimage(pil_image: Image.Image) -> QImage:
+    """Copy a PIL image straight into a new Qt-owned QImage.
+
+    The PIL pixels are pasted into a view of the QImage's own buffer, so there
+    is a single copy and no intermediate bytes object. The QImage owns its
+    memory and can safely be passed to another thread.
+    """
+    if pil_image.mode != "RGBA":
+        # Forcing RGBA ensures consistency even if original was RGB or L
+        pil_image = pil_image.convert("RGBA")
+
+    qimage = QImage(pil_image.width, pil_image.height, QImage.Format.Format_RGBA8888)
+    bits = qimage.bits()
+    bits.setsize(qimage.sizeInBytes())
+    view = Image.frombuffer("RGBA", pil_image.size, bits, "raw", "RGBA", qimage.bytesPerLine(), 1)
+    # frombuffer images are read-only (a write would copy them): allow writing through to Qt
+    view.readonly = 0
+    view.paste(pil_image)
+    return qimage
+
+
+class HighlightOverlay(QWidget):
+    """Dashed frame around the selected layer, drawn over the preview label.
+
+    Kept separate from the preview pixmap so selecting another layer or
+    resizing never touches the image itself.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WidgetAttribute.WA_NoSystemBackground)
+        self.rect_on_screen = None
+
+    def set_rect(self, rect):
+        if rect != self.rect_on_screen:
+            self.rect_on_screen = rect
+            self.update()
+
+    def paintEvent(self, event):
+        if self.rect_on_screen is None:
+            return
+        painter = QPainter(self)
+        # Different color? Red is standard highlight
+        pen = QPen(QColor(255, 0, 0)) # Red
+        pen.setWidth(2)
+        pen.setStyle(Qt.PenStyle.DashLine)
+        painter.setPen(pen)
+        painter.drawRect(self.rect_on_screen)
+        painter.end()
+
+
 class PreviewWidget(QWidget):
+    MAX_SCALED_PIXMAPS = 4 # Scaled versions of the current image, one per label size
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
         self.layout.setContentsMargins(0, 0, 0, 0)
-        
+
         self.image_label = QLabel("No Preview")
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         # Checkered background or dark grey for transparency
         self.image_label.setStyleSheet("background-color: #2b2b2b; color: #888; border: 1px solid #444;")
         self.image_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
         self.image_label.setScaledContents(False)  # We handle scaling manually or use proper ratio policy
-        
+
         self.layout.addWidget(self.image_label)
-        
+
+        self.highlight_overlay = HighlightOverlay(self.image_label)
+
         self.current_pixmap = None
+        self._scaled_pixmaps = {} # label size -> scaled pixmap of current_pixmap
         self.highlight_layer = None
+        self.image_scale = 1.0 # Size of the shown image relative to the full resolution output
 
     def update_image(self, pil_image: Image.Image, highlight_layer=None):
-        self.highlight_layer = highlight_layer
-        
         if pil_image is None:
+            self.update_qimage(None, highlight_layer)
+            return
+        self.update_qimage(pil_to_qimage(pil_image), highlight_layer)
+
+    def update_qimage(self, qimage: QImage, highlight_layer=None, scale: float = 1.0):
+        """Show an already converted image (e.g. rendered in a worker thread).
+
+        scale is the size of the image relative to the full resolution output,
+        used to place the highlight on proxy renders.
+        """
+        self.highlight_layer = highlight_layer
+        self.image_scale = scale
+        self._scaled_pixmaps.clear()
+
+        if qimage is None:
             self.image_label.setText("No Preview")
             self.current_pixmap = None
+            self.highlight_overlay.set_rect(None)
             return
 
-        # Convert PIL to QPixmap
-        if pil_image.mode != "RGBA":
-            # Forcing RGBA ensures consistency even if original was RGB or L
-            pil_image = pil_image.convert("RGBA")
-            
-        data = pil_image.tobytes("raw", "RGBA")
-        qimage = QImage(data, pil_image.width, pil_image.height, QImage.Format.Format_RGBA8888)
         self.current_pixmap = QPixmap.fromImage(qimage)
-        
-        # Draw highlight on the pixmap if needed
-        if self.highlight_layer and self.highlight_layer.enabled and self.highlight_layer.name != "Background":
-             self._draw_highlight_on_pixmap()
-        
-        self.image_label.setPixmap(self.current_pixmap)
         self._update_display()
-        
+
+    def set_highlight_layer(self, highlight_layer):
+        """Move the highlight to another layer without touching the image."""
+        self.highlight_layer = highlight_layer
+        self._update_highlight()
+
     def resizeEvent(self, event):
         self._update_display()
         super().resizeEvent(event)
-        
+
     def _update_display(self):
+        self.highlight_overlay.setGeometry(self.image_label.rect())
         if self.current_pixmap and not self.current_pixmap.isNull():
-             # Scale to widget size keeping aspect ratio
-             scaled = self.current_pixmap.scaled(
-                 self.image_label.size(), 
-                 Qt.AspectRatioMode.KeepAspectRatio, 
-                 Qt.TransformationMode.SmoothTransformation
-             )
-             self.image_label.setPixmap(scaled)
-
-    def _draw_highlight_on_pixmap(self):
-        if not self.current_pixmap or not self.highlight_layer:
+            # Scale to widget size keeping aspect ratio, once per size
+            size = self.image_label.size()
+            key = (size.width(), size.height())
+            scaled = self._scaled_pixmaps.get(key)
+            if scaled is None:
+                scaled = self.current_pixmap.scaled(
+                    size,
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation
+                )
+                if len(self._scaled_pixmaps) >= self.MAX_SCALED_PIXMAPS:
+                    self._scaled_pixmaps.clear()
+                self._scaled_pixmaps[key] = scaled
+            self.image_label.setPixmap(scaled)
+        self._update_highlight()
+
+    def _update_highlight(self):
+        layer = self.highlight_layer
+        pixmap = self.image_label.pixmap()
+        if (not layer or not layer.enabled or layer.name == "Background"
+                or not self.current_pixmap or pixmap is None or pixmap.isNull()):
+            self.highlight_overlay.set_rect(None)
             return
-            
-        # We need to draw on a copy or modify the current one?
-        # Drawing on current pixmap is fine as it's regenerated every update
-        painter = QPainter(self.current_pixmap)
-        
-        # Different color? Red is standard highlight
-        pen = QPen(QColor(255, 0, 0)) # Red
-        pen.setWidth(2)
-        pen.setStyle(Qt.PenStyle.DashLine)
-        painter.setPen(pen)
-        
-        x = self.highlight_layer.x
-        y = self.highlight_layer.y
-        w = self.highlight_layer.width
-        h = self.highlight_layer.height
-        
-        if w > 0 and h > 0:
-            painter.drawRect(x, y, w, h)
-            
-        painter.end()
+
+        # Layer geometry is in full resolution pixels; the shown pixmap is the
+        # image (itself image_scale of full resolution) scaled and centered in the label
+        shown_w, shown_h = pixmap.width(), pixmap.height()
+        factor = self.image_scale * shown_w / self.current_pixmap.width()
+        area = self.image_label.contentsRect()
+        left = area.x() + (area.width() - shown_w) // 2
+        top = area.y() + (area.height() - shown_h) // 2
+
+        w = round(layer.width * factor)
+        h = round(layer.height * factor)
+        if w <= 0 or h <= 0:
+            self.highlight_overlay.set_rect(None)
+            return
+        self.highlight_overlay.set_rect(QRect(left + round(layer.x * factor), top + round(layer.y * factor), w, h))